@@ -1,27 +1,60 @@
 # invoice_timesheets_compiler_final.py
 import os
+import io
+import json
+import re
+import sqlite3
+import hashlib
+import zlib
+import tempfile
 import time
 import threading
-from datetime import datetime
+import queue
+from collections import deque
+from abc import ABC, abstractmethod
+import sys
+import subprocess
+import signal
+import multiprocessing
+import multiprocessing.connection
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
+from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 import shutil
 
-from PyPDF2 import PdfMerger, PdfReader, PdfWriter
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject,
+                             NumberObject, StreamObject)
 from PIL import Image, ImageOps
-from docx2pdf import convert
 import openpyxl
 import winsound
 
+try:
+    import numpy as np  # optional: only the monochrome image stage needs it
+except ImportError:
+    np = None
+try:
+    import pikepdf  # optional: PDF_ENGINE = "pikepdf"
+except ImportError:
+    pikepdf = None
+
 # ================ CONFIG ================
 main_folder = r"O:\ApTask\TDrive\FinTech LLC\Invoices\2025\Monthly"
 excel_file  = r"C:\Users\HimalK\OneDrive - APTASK\Desktop\Aptask\Payroll\Automated email sheet\Emailexcel.xlsx"
 log_folder  = r"C:\Users\HimalK\OneDrive - APTASK\Desktop\Aptask\Payroll\Timesheet_Invoice Merger\Logfile"
 backup_folder = r"O:\ApTask\TDrive\FinTech LLC\PayRoll\2025\Weekly Payroll\Weekly Payroll Prep\Backup"
-os.makedirs(log_folder, exist_ok=True)
-os.makedirs(backup_folder, exist_ok=True)
+# Local (non-synced) disk: converted timesheets (filled ahead of time by watch mode) and read-ahead copies of raw files
+local_cache_root = os.path.join(os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "TimesheetMerger")
+# Cached client/month/week listings of main_folder and the recent merges (rebuilt from the share when missing).
+# Kept off OneDrive so the sync client can't lock or conflict-copy the database while it's open.
+index_db = os.path.join(local_cache_root, "folder_index.sqlite")
+conversion_cache_folder = os.path.join(local_cache_root, "ConversionCache")
+readahead_folder = os.path.join(local_cache_root, "ReadAhead")
+quarantine_folder = os.path.join(local_cache_root, "Quarantine")
 
 clients_list = [
     "Aquila Energy", "BDR", "B Squared", "CFAIS", "Data Specialist",
@@ -29,6 +62,69 @@ clients_list = [
     "Security 101", "VFS Fire", "Western Audio"
 ]
 
+# Parallel client lookups during the quick scan (each one pays SMB latency on O:)
+SCAN_WORKERS = 8
+# Watch mode polls the week folders this often (seconds); polling works on SMB and Linux alike
+WATCH_INTERVAL = 60
+# Scan results younger than this are reused as-is; older ones are revalidated by relisting the week folder
+SCAN_CACHE_TTL = 30
+# A client lookup that has spent this many seconds in share operations (not counting time queued
+# for the share) without finishing is reported as timed out and abandoned
+SCAN_DIR_TIMEOUT = 20
+# A batch end earlier in the year than its start means next year only if that is at most this many
+# days after the start (a catch-up across New Year); anything else is rejected as a typo
+BATCH_ROLLOVER_DAYS = 92
+# Read-ahead copies raw files off the share in chunks this large, on this many background threads
+READAHEAD_CHUNK = 4 * 1024 * 1024
+READAHEAD_WORKERS = 2
+# Disk budget for cached image/Word conversions; least recently used entries are evicted beyond it
+CONVERSION_CACHE_MB = 1024
+# Worker processes for timesheet conversion (Pillow encoding, PDF parsing, Word). Every file gets
+# CONVERT_TIMEOUT seconds and each worker CONVERT_MEMORY_MB; a worker past either is killed and the
+# file retried CONVERT_RETRIES times, then quarantined (copied to quarantine_folder and skipped until it changes)
+CONVERT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+CONVERT_TIMEOUT = 120
+CONVERT_MEMORY_MB = 2048
+CONVERT_RETRIES = 1
+MEMORY_CAP_EXIT = 86
+# Concurrency bounds for operations on the O: share; the scheduler tunes itself between them
+IO_MIN_CONCURRENCY = 1
+IO_MAX_CONCURRENCY = 16
+# Back off when an operation takes this many times longer than expected: the fastest round trip
+# we've seen for its kind, plus (for reads/writes) its bytes at the best throughput we've seen
+IO_BACKOFF_FACTOR = 3.0
+# Reads/writes at least this large are timed as transfers, which is how the throughput is learned
+IO_TRANSFER_BYTES = 256 * 1024
+# Image timesheets are laid out on this page size (inches, turned to match the image) ...
+IMAGE_PAGE_SIZE = (8.5, 11)
+# ... and images with more pixels than this DPI needs on that page are downsampled (0 = never).
+# Only worth a recompression when the image is at least IMAGE_DOWNSAMPLE_THRESHOLD times too large.
+IMAGE_TARGET_DPI = 150
+IMAGE_DOWNSAMPLE_THRESHOLD = 1.5
+# JPEG quality for images that have to be re-encoded (downsampled, PNGs, CMYK, ...); others are embedded as-is
+IMAGE_JPEG_QUALITY = 75
+# Black-and-white forms photographed in colour are stored as 1-bit (or flattened grayscale when
+# they have shading) - needs NumPy. A scan counts as monochrome when no more than MONO_COLOR_FRACTION
+# of its pixels are more saturated than MONO_CHROMA_LEVEL (0-255) beyond the lighting's colour cast.
+IMAGE_MONOCHROME = True
+MONO_CHROMA_LEVEL = 40
+MONO_COLOR_FRACTION = 0.01
+# Relative to the local paper brightness: darker than MONO_INK_RATIO is ink. Pages where more than
+# MONO_MIDTONE_FRACTION of pixels sit in between ink and paper keep grayscale instead of 1-bit.
+MONO_INK_RATIO = 0.75
+MONO_MIDTONE_FRACTION = 0.06
+# PDF engine for page geometry, rotation and the merge: "pypdf2" (default, pure Python) or
+# "pikepdf" (qpdf, needs `pip install pikepdf`). `python 115.py --benchmark-pdf FOLDER` compares them.
+PDF_ENGINE = "pypdf2"
+# How merged files are written: "fast" (streams as they come, plain xref table), "balanced" (Flate
+# on uncompressed content streams, compressed xref) or "smallest" (maximum Flate, recompressed
+# streams, small objects packed into object streams - slowest to write)
+OUTPUT_PROFILE = "balanced"
+# Word converter: "msword" (MS Word through pywin32), "libreoffice" (headless soffice) or "auto"
+WORD_BACKEND = "auto"
+# Seconds a Word converter may go without finishing a document before it is given up on
+WORD_BATCH_TIMEOUT = 120
+
 APP_TITLE = "Invoice and Timesheets Compiler"
 THEME_BG = "#2b6cb0"
 PANEL_BG = "#ffffff"
@@ -80,148 +176,2744 @@ class StepLogger:
         self._write_file(line)
 
 
+# ---------- Share I/O scheduling ----------
+class AdaptiveIOScheduler:
+    """One concurrency limit for every operation on the network share, tuned AIMD-style.
+
+    Each kind of operation ("stat", "list", "read", "write", "move") keeps a baseline
+    of its fastest recent round trip, and kinds that move data also keep their best
+    throughput, so a call's expected time is round trip + bytes / throughput. A call
+    that finishes near that raises the limit by about one per round of calls (additive
+    increase); one that takes IO_BACKOFF_FACTOR times longer halves it (multiplicative
+    decrease), so we back off as soon as the file server starts throttling and creep
+    back up after. A 20 MB read after a 100 KB one is slower, not congested.
+    """
+
+    def __init__(self, initial=4, minimum=IO_MIN_CONCURRENCY, maximum=IO_MAX_CONCURRENCY):
+        self._cond = threading.Condition()
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(initial)
+        self.active = 0
+        self._baseline = {}
+        self._throughput = {}
+        self._last_backoff = 0.0
+        # Per thread: seconds spent inside finished operations, start of the one running now
+        self._busy = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._cond:
+            self.ops = 0
+            self.bytes = 0
+            self.backoffs = 0
+            self._first_start = None
+            self._last_end = None
+
+    def run(self, kind, fn, *args, nbytes=0, **kwargs):
+        with self._cond:
+            while self.active >= int(self.limit):
+                self._cond.wait()
+            self.active += 1
+            start = time.perf_counter()
+            busy = self._busy.setdefault(threading.get_ident(), [0.0, None])
+            busy[1] = start
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            with self._cond:
+                busy[0] += end - start
+                busy[1] = None
+                self.active -= 1
+                self.ops += 1
+                self.bytes += nbytes
+                if self._first_start is None:
+                    self._first_start = start
+                self._last_end = end
+                self._adjust(kind, end - start, end, nbytes)
+                self._cond.notify_all()
+
+    def _adjust(self, kind, latency, now, nbytes=0):
+        baseline = self._baseline.get(kind)
+        throughput = self._throughput.get(kind)
+        if nbytes < IO_TRANSFER_BYTES:
+            if baseline is None or latency < baseline:
+                baseline = latency
+            else:
+                # Let the baseline drift up slowly so a permanently slower server isn't treated as congested forever
+                baseline += 0.05 * (latency - baseline)
+            self._baseline[kind] = baseline
+            expected = baseline
+        else:
+            overhead = baseline or 0.0
+            rate = nbytes / max(latency - overhead, 1e-6)
+            if throughput is None or rate > throughput:
+                self._throughput[kind] = rate
+            else:
+                # Same slow drift, downwards, for the throughput
+                self._throughput[kind] = throughput + 0.05 * (rate - throughput)
+            if throughput is None:
+                return  # the first transfer only tells us what to expect from the next
+            expected = overhead + nbytes / throughput
+
+        if latency > IO_BACKOFF_FACTOR * expected and latency > 0.02:
+            # At most one halving per slow round trip, so a burst of slow replies doesn't collapse us to 1
+            if now - self._last_backoff > latency:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._last_backoff = now
+                self.backoffs += 1
+        else:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def busy_time(self, thread_id):
+        """Seconds a thread has spent admitted to share operations - time queued for a slot not included"""
+        with self._cond:
+            total, running_since = self._busy.get(thread_id, (0.0, None))
+            return total + (time.perf_counter() - running_since if running_since is not None else 0.0)
+
+    def report(self):
+        with self._cond:
+            span = (self._last_end - self._first_start) if self._first_start is not None else 0.0
+            ops, nbytes, backoffs, limit = self.ops, self.bytes, self.backoffs, int(self.limit)
+        if span <= 0:
+            return f"Share I/O: {ops} operations, concurrency {limit}"
+        return (f"Share I/O: {ops} ops, {nbytes / 1048576:.1f} MB in {span:.1f}s "
+                f"({ops / span:.1f} ops/s, {nbytes / 1048576 / span:.2f} MB/s), "
+                f"concurrency {limit}, {backoffs} back-offs")
+
+
+io_scheduler = AdaptiveIOScheduler()
+
+
+def share_io(kind, fn, *args, nbytes=0, **kwargs):
+    """Run one network-share operation under the adaptive concurrency limit"""
+    return io_scheduler.run(kind, fn, *args, nbytes=nbytes, **kwargs)
+
+
+def copy_file_chunked(src, dst, kind, size, chunk=READAHEAD_CHUNK):
+    """Sequential copy off ("read") or onto ("write") the share in large chunks.
+
+    Each chunk is its own share operation, so a large file gives its slot back between
+    chunks instead of holding it for the whole copy, and never sits in memory whole.
+    """
+    from_share, to_share = kind == "read", kind == "write"
+    with (share_io("stat", open, src, "rb", buffering=0) if from_share else open(src, "rb", buffering=0)) as fin, \
+         (share_io("stat", open, dst, "wb") if to_share else open(dst, "wb")) as fout:
+        remaining = size
+        while True:
+            if from_share:
+                data = share_io("read", fin.read, chunk, nbytes=max(0, min(chunk, remaining)))
+            else:
+                data = fin.read(chunk)
+            if not data:
+                break
+            if to_share:
+                share_io("write", fout.write, data, nbytes=len(data))
+            else:
+                fout.write(data)
+            remaining -= len(data)
+        if to_share:
+            share_io("write", fout.flush)
+
+
 # ---------- File helpers ----------
-def rotate_pdf_if_needed(src_pdf, dst_pdf):
+def word_page_rotation(w, h):
+    """Extra rotation for a converted Word page: landscape pages are turned to portrait"""
+    # (the old "very wide page" case, w > h * 1.5, is already covered by w > h)
+    return 90 if w > h else 0
+
+
+def timesheet_page_rotation(w, h):
+    """Extra rotation for a timesheet PDF page (enhanced orientation logic for alignment with invoices)"""
+    if w > h:
+        # Landscape page - rotate to portrait for better alignment
+        return 90
+    elif w > h * 1.2:
+        # Wide page - likely a timesheet that needs rotation
+        return 90
+    elif w < h * 0.8:
+        # Very tall page - might need rotation
+        return 90
+    # For standard A4/Letter ratios, keep as-is for perfect alignment
+    return 0
+
+
+def page_geometry(page):
+    """(width, height, /Rotate) of a page; MediaBox and /Rotate may be inherited from the page tree"""
+    box = page.mediabox
+    return float(box.width), float(box.height), int(page.rotation or 0) % 360
+
+
+def geometry_plan(geometry, rule):
+    """Per-page extra rotation from (width, height, /Rotate) triples; the rule sees the page as displayed"""
+    plan = []
+    for w, h, rotate in geometry:
+        if rotate in (90, 270):
+            w, h = h, w
+        plan.append(rule(w, h))
+    return plan
+
+
+def probe_page_geometry(src_pdf):
+    """(width, height, /Rotate) for every page, without loading the PDF (see PdfEngine.page_geometry)"""
+    return get_pdf_engine().page_geometry(src_pdf)
+
+
+class PreparedDoc:
+    """A timesheet ready for the merge writer.
+
+    `pdf` is a local file path or in-memory PDF bytes, and `rotations` the extra
+    rotation per page (None leaves every page as it is). The PDF engine opens it
+    when its pages are written, and nothing is written next to the source on the share.
+    """
+
+    def __init__(self, source, pdf, rotations=None, reader=None):
+        self.source = source
+        self.pdf = pdf
+        self.rotations = rotations
+        self._reader = reader
+        self._file = None
+
+    def reader(self):
+        if self._reader is None:
+            if isinstance(self.pdf, bytes):
+                self._reader = PdfReader(io.BytesIO(self.pdf))
+            else:
+                # Read through an open file so objects are loaded on demand, not the whole PDF up front
+                self._file = open(self.pdf, "rb")
+                self._reader = PdfReader(self._file)
+        return self._reader
+
+    def pages(self):
+        """Pages with the planned rotation applied"""
+        for i, page in enumerate(self.reader().pages):
+            angle = self.rotations[i] if self.rotations and i < len(self.rotations) else 0
+            if angle:
+                page.rotate(angle)
+            yield page
+
+    def close(self):
+        self._reader = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __getstate__(self):
+        # Sent to a merge worker as path/bytes + rotations; the worker opens its own reader
+        state = self.__dict__.copy()
+        state["_reader"] = state["_file"] = None
+        return state
+
+
+def prepare_pdf(src_pdf, source=None, rule=timesheet_page_rotation):
+    """Plan page rotations for a PDF from its page geometry alone"""
+    plan = geometry_plan(probe_page_geometry(src_pdf), rule)
+    return PreparedDoc(source or src_pdf, src_pdf, plan if any(plan) else None)
+
+
+# EXIF orientations that are a plain rotation map onto the page's /Rotate (clockwise);
+# mirrored ones (2, 4, 5, 7) go through Pillow
+EXIF_PAGE_ROTATION = {1: 0, 3: 180, 6: 90, 8: 270}
+PDF_COLORSPACES = {"L": "/DeviceGray", "RGB": "/DeviceRGB"}
+
+
+class ImagePage:
+    """One image XObject filling its own page; build_image_pdf writes these without re-encoding"""
+
+    __slots__ = ("data", "width", "height", "colorspace", "bits", "filter", "rotate")
+
+    def __init__(self, data, width, height, colorspace, bits=8, filter="/DCTDecode", rotate=0):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.colorspace = colorspace
+        self.bits = bits
+        self.filter = filter
+        self.rotate = rotate
+
+    def page_size(self):
+        return fit_page(self.width, self.height)
+
+    def to_bytes(self):
+        """Compact form for the conversion cache and worker results: a JSON header line, then the image data"""
+        head = {"w": self.width, "h": self.height, "cs": self.colorspace, "bits": self.bits,
+                "filter": self.filter, "rotate": self.rotate}
+        return json.dumps(head).encode("ascii") + b"\n" + self.data
+
+    @classmethod
+    def from_bytes(cls, blob):
+        head, _, data = blob.partition(b"\n")
+        head = json.loads(head)
+        return cls(data, head["w"], head["h"], head["cs"], head["bits"], head["filter"], head["rotate"])
+
+
+def _page_box(width, height):
+    """IMAGE_PAGE_SIZE in inches, turned to the image's orientation"""
+    pw, ph = IMAGE_PAGE_SIZE
+    if (width > height) != (pw > ph):
+        pw, ph = ph, pw
+    return pw, ph
+
+
+def fit_page(width, height):
+    """Page size in points for a width × height image scaled to fit the image page box"""
+    pw, ph = _page_box(width, height)
+    scale = min(pw * 72 / width, ph * 72 / height)
+    return width * scale, height * scale
+
+
+def downsample_size(width, height):
+    """Pixel size to resample an image to for IMAGE_TARGET_DPI on its page, or None to leave it alone"""
+    if not IMAGE_TARGET_DPI:
+        return None
+    pw, ph = _page_box(width, height)
+    scale = min(pw * IMAGE_TARGET_DPI / width, ph * IMAGE_TARGET_DPI / height)
+    if scale * IMAGE_DOWNSAMPLE_THRESHOLD > 1:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _pdf_num(x):
+    return f"{x:.4f}".rstrip("0").rstrip(".")
+
+
+def build_image_pdf(pages):
+    """A PDF with one page per ImagePage, written directly (the image data is embedded as-is)"""
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+
+    def write_obj(num, head, stream=None):
+        offsets.append((num, out.tell()))
+        out.write(f"{num} 0 obj\n".encode("ascii"))
+        out.write(head.encode("ascii"))
+        if stream is not None:
+            out.write(b"\nstream\n")
+            out.write(stream)
+            out.write(b"\nendstream")
+        out.write(b"\nendobj\n")
+
+    kids = " ".join(f"{3 + 3 * i} 0 R" for i in range(len(pages)))
+    write_obj(1, "<< /Type /Catalog /Pages 2 0 R >>")
+    write_obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    for i, page in enumerate(pages):
+        page_num, image_num, content_num = 3 + 3 * i, 4 + 3 * i, 5 + 3 * i
+        w, h = (_pdf_num(v) for v in page.page_size())
+        rotate = f" /Rotate {page.rotate}" if page.rotate else ""
+        write_obj(page_num, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w} {h}]{rotate} "
+                            f"/Resources << /XObject << /Im0 {image_num} 0 R >> >> /Contents {content_num} 0 R >>")
+        write_obj(image_num, f"<< /Type /XObject /Subtype /Image /Width {page.width} /Height {page.height} "
+                             f"/ColorSpace {page.colorspace} /BitsPerComponent {page.bits} "
+                             f"/Filter {page.filter} /Length {len(page.data)} >>", page.data)
+        content = f"q {w} 0 0 {h} 0 0 cm /Im0 Do Q".encode("ascii")
+        write_obj(content_num, f"<< /Length {len(content)} >>", content)
+
+    xref_at = out.tell()
+    offsets.sort()
+    out.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode("ascii"))
+    for _, offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+    out.write(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode("ascii"))
+    return out.getvalue()
+
+
+def encode_image_page(image):
+    """Re-encode a decoded (already upright) image as a JPEG page; alpha is flattened onto white"""
+    if image.mode in ("1", "L", "LA"):
+        target = "L"
+    else:
+        target = "RGB"
+    if "A" in image.getbands() or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        flat = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        flat.alpha_composite(rgba)
+        image = flat
+    image = image.convert(target)
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=IMAGE_JPEG_QUALITY)
+    return ImagePage(buf.getvalue(), image.width, image.height, PDF_COLORSPACES[target])
+
+
+def _near_monochrome(rgb):
+    """rgb: int16 H×W×3 array. True when the only colour is the overall cast of the lighting/paper"""
+    chroma = rgb.max(axis=2) - rgb.min(axis=2)
+    chroma -= int(np.median(chroma))
+    return np.count_nonzero(chroma > MONO_CHROMA_LEVEL) <= chroma.size * MONO_COLOR_FRACTION
+
+
+def _looks_monochrome(image_path):
+    """Cheap check on a 1/8-scale JPEG decode, so colour photos keep the passthrough path"""
+    with Image.open(image_path) as probe:
+        probe.draft("RGB", (max(1, probe.width // 8), max(1, probe.height // 8)))
+        return _near_monochrome(np.asarray(probe.convert("RGB"), dtype=np.int16))
+
+
+def _local_mean(gray, radius):
+    """Box-filtered mean over a (2*radius+1)² window, via an integral image"""
+    padded = np.pad(gray, radius + 1, mode="edge")
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    k = 2 * radius + 1
+    h, w = gray.shape
+    window = (integral[k:k + h, k:k + w] - integral[:h, k:k + w]
+              - integral[k:k + h, :w] + integral[:h, :w])
+    return window / (k * k)
+
+
+def monochrome_page(image):
+    """1-bit (Flate) or flattened grayscale page for a near-monochrome scan; None if it has real colour"""
+    rgb = np.asarray(image.convert("RGB"), dtype=np.int16)
+    if not _near_monochrome(rgb):
+        return None
+    gray = rgb @ np.array([0.299, 0.587, 0.114])
+    # Dividing by the local paper brightness evens out shadows and uneven phone lighting
+    paper = _local_mean(gray, max(8, min(gray.shape) // 16))
+    ratio = gray / np.maximum(paper, 1.0)
+    midtones = np.count_nonzero((ratio > MONO_INK_RATIO * 0.5) & (ratio < MONO_INK_RATIO * 0.95))
+    h, w = gray.shape
+    if midtones <= gray.size * MONO_MIDTONE_FRACTION:
+        # PDF 1-bit gray: 0 is black; rows are padded to whole bytes
+        paper_bits = np.packbits(ratio >= MONO_INK_RATIO, axis=1)
+        return ImagePage(zlib.compress(paper_bits.tobytes(), 9), w, h, "/DeviceGray", bits=1, filter="/FlateDecode")
+    flattened = Image.fromarray(np.clip(ratio * 255, 0, 255).astype(np.uint8), "L")
+    buf = io.BytesIO()
+    flattened.save(buf, format="JPEG", quality=IMAGE_JPEG_QUALITY)
+    return ImagePage(buf.getvalue(), w, h, "/DeviceGray")
+
+
+def image_page(image_path):
+    """ImagePage for a timesheet image.
+
+    RGB/grayscale JPEGs already at a sensible resolution are embedded without decoding.
+    Oversized images are downsampled to IMAGE_TARGET_DPI - JPEGs are decoded straight
+    at 1/2, 1/4 or 1/8 scale via draft() - and recompressed.
+    """
+    monochrome = IMAGE_MONOCHROME and np is not None
+    with Image.open(image_path) as image:
+        target = downsample_size(*image.size)
+        passthrough = None
+        if target is None and image.format == "JPEG" and image.mode in PDF_COLORSPACES:
+            rotate = EXIF_PAGE_ROTATION.get(image.getexif().get(0x0112, 1))
+            if rotate is not None:
+                with open(image_path, "rb") as f:
+                    data = f.read()
+                passthrough = ImagePage(data, image.width, image.height, PDF_COLORSPACES[image.mode], rotate=rotate)
+                if not (monochrome and _looks_monochrome(image_path)):
+                    return passthrough
+        if target is not None and image.format == "JPEG":
+            image.draft(None, target)
+        # Downsampled, CMYK, alpha, palettes, mirrored EXIF, non-JPEG formats: decode and re-encode
+        transposed = ImageOps.exif_transpose(image)
+        if target is not None:
+            if transposed.size != image.size and transposed.size == image.size[::-1]:
+                target = target[::-1]
+            if transposed.size != target:
+                transposed = transposed.resize(target, Image.LANCZOS, reducing_gap=3.0)
+        image = transposed
+        if monochrome:
+            page = monochrome_page(image)
+            if page is not None:
+                return page
+        return passthrough or encode_image_page(image)
+
+
+def image_page_bytes(image_path):
+    return image_page(image_path).to_bytes()
+
+
+class WordBackend(ABC):
+    """Converts a batch of Word documents to PDF in one application session.
+
+    convert_batch(docs, out_dir) gets local document paths whose base names are
+    unique and must leave <stem>.pdf in out_dir for each one it converted.
+    """
+    name = "none"
+
+    def available(self):
+        return False
+
+    @abstractmethod
+    def convert_batch(self, docs, out_dir):
+        ...
+
+
+class MSWordBackend(WordBackend):
+    """MS Word over COM (Windows); a private Word instance per batch, never one the user has open"""
+    name = "msword"
+
+    def available(self):
+        return sys.platform == "win32"
+
+    def convert_batch(self, docs, out_dir):
+        import pythoncom  # COM has to be initialised on whichever thread drives Word
+        import win32com.client
+        pythoncom.CoInitialize()
+        word = None
+        try:
+            # DispatchEx always starts a new WINWORD.EXE; Dispatch would attach to a running
+            # one - including a Word left hung by a killed worker
+            word = win32com.client.DispatchEx("Word.Application")
+            word.Visible = False
+            word.DisplayAlerts = 0  # wdAlertsNone
+            caption = f"TimesheetMerger {os.getpid()} {time.monotonic()}"
+            word.Caption = caption
+            pid = window_process_id("OpusApp", caption)
+            if pid:
+                register_converter_process(pid)
+            for doc in docs:
+                out_pdf = os.path.join(out_dir, os.path.splitext(os.path.basename(doc))[0] + ".pdf")
+                try:
+                    document = word.Documents.Open(doc, ConfirmConversions=False, ReadOnly=True,
+                                                   AddToRecentFiles=False, Visible=False)
+                except Exception:
+                    continue  # no PDF - reported per document by convert_word_batch
+                try:
+                    document.SaveAs2(out_pdf, FileFormat=17)  # wdFormatPDF
+                except Exception:
+                    pass
+                finally:
+                    document.Close(0)  # wdDoNotSaveChanges
+                report_conversion_progress()
+        finally:
+            if word is not None:
+                try:
+                    word.Quit(0)
+                except Exception:
+                    pass
+            pythoncom.CoUninitialize()
+
+
+class LibreOfficeBackend(WordBackend):
+    """Headless LibreOffice; one soffice process converts the whole batch"""
+    name = "libreoffice"
+
+    def __init__(self):
+        self.soffice = shutil.which("soffice") or shutil.which("libreoffice")
+
+    def available(self):
+        return self.soffice is not None
+
+    def convert_batch(self, docs, out_dir):
+        # A fresh profile per batch: soffice hands its work to any instance already running on
+        # the same profile, which could be a hung one, or a desktop LibreOffice the user has open
+        profile = tempfile.mkdtemp(prefix="profile_", dir=os.path.dirname(out_dir))
+        cmd = [
+            self.soffice, "--headless", "--norestore", "--nolockcheck",
+            f"-env:UserInstallation={Path(profile).as_uri()}",
+            "--convert-to", "pdf", "--outdir", out_dir,
+        ] + list(docs)
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        register_converter_process(proc.pid)
+        try:
+            # soffice reports nothing while it works, so each PDF appearing in out_dir counts as
+            # progress: the budget is per document, however long the batch
+            done = 0
+            deadline = time.monotonic() + WORD_BATCH_TIMEOUT
+            while True:
+                try:
+                    proc.wait(timeout=1)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                finished = sum(1 for name in os.listdir(out_dir) if name.lower().endswith(".pdf"))
+                if finished > done:
+                    for _ in range(finished - done):
+                        report_conversion_progress()
+                    done = finished
+                    deadline = time.monotonic() + WORD_BATCH_TIMEOUT
+                elif time.monotonic() > deadline:
+                    kill_process_tree(proc.pid)
+                    raise subprocess.TimeoutExpired(cmd, WORD_BATCH_TIMEOUT)
+        finally:
+            shutil.rmtree(profile, ignore_errors=True)
+
+
+WORD_BACKENDS = {
+    "msword": MSWordBackend,
+    "libreoffice": LibreOfficeBackend,
+}
+
+_word_backend = None
+_word_backend_lock = threading.Lock()
+
+
+def get_word_backend():
+    """The configured Word backend; "auto" prefers MS Word on Windows, LibreOffice elsewhere"""
+    global _word_backend
+    with _word_backend_lock:
+        if _word_backend is None:
+            names = list(WORD_BACKENDS) if WORD_BACKEND == "auto" else [WORD_BACKEND]
+            for name in names:
+                backend = WORD_BACKENDS[name]()
+                if backend.available():
+                    _word_backend = backend
+                    break
+            else:
+                raise RuntimeError(f"No Word converter available (WORD_BACKEND = {WORD_BACKEND!r})")
+        return _word_backend
+
+
+def word_backend_name():
+    try:
+        return get_word_backend().name
+    except RuntimeError:
+        return "none"
+
+
+def convert_word_batch(doc_paths):
+    """Convert every Word document in one backend session: {doc_path: pdf_bytes or Exception}"""
+    results = {}
+    if not doc_paths:
+        return results
+    os.makedirs(local_cache_root, exist_ok=True)
+    # Scratch folders of batches whose worker was killed never reach the rmtree below
+    cutoff = time.time() - 24 * 3600
+    with os.scandir(local_cache_root) as it:
+        stale = [entry.path for entry in it
+                 if entry.name.startswith("word_") and entry.is_dir() and entry.stat().st_mtime < cutoff]
+    for folder in stale:
+        shutil.rmtree(folder, ignore_errors=True)
+    scratch = tempfile.mkdtemp(prefix="word_", dir=local_cache_root)
     try:
-        reader = PdfReader(src_pdf)
-        writer = PdfWriter()
-        for page in reader.pages:
+        in_dir = os.path.join(scratch, "in")
+        out_dir = os.path.join(scratch, "out")
+        os.makedirs(in_dir)
+        os.makedirs(out_dir)
+        # Numbered names: clients reuse file names across folders, and the backends name outputs by stem
+        staged = {}
+        for n, doc in enumerate(doc_paths):
+            name = f"{n:04d}{os.path.splitext(doc)[1].lower()}"
             try:
-                w = float(page.mediabox.width)
-                h = float(page.mediabox.height)
-                # Improved rotation logic for better timesheet alignment
-                if w > h:
-                    # Landscape page - rotate to portrait for better alignment with invoice
-                    page.rotate(90)
-                # Additional check for very wide pages that might be timesheets
-                elif w > h * 1.5:
-                    # Very wide page - likely a timesheet that needs rotation
-                    page.rotate(90)
-            except Exception:
-                pass
-            writer.add_page(page)
-        with open(dst_pdf, "wb") as f:
-            writer.write(f)
-    except Exception:
-        # fallback: copy file
+                shutil.copyfile(doc, os.path.join(in_dir, name))
+                staged[doc] = os.path.join(in_dir, name)
+            except OSError as e:
+                results[doc] = e
+        if staged:
+            try:
+                get_word_backend().convert_batch(list(staged.values()), out_dir)
+            except Exception as e:
+                for doc in staged:
+                    results[doc] = e
+                return results
+        for doc, staged_path in staged.items():
+            out_pdf = os.path.join(out_dir, os.path.splitext(os.path.basename(staged_path))[0] + ".pdf")
+            try:
+                with open(out_pdf, "rb") as f:
+                    results[doc] = f.read()
+            except OSError:
+                results[doc] = RuntimeError("Word conversion produced no PDF")
+        return results
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def word_to_pdf_bytes(doc_path):
+    """Convert a single Word document and return the PDF bytes"""
+    outcome = convert_word_batch([doc_path])[doc_path]
+    if isinstance(outcome, Exception):
+        raise outcome
+    return outcome
+
+
+def process_memory(pid=None):
+    """Resident memory of this process (or of pid) in bytes; 0 if the platform doesn't tell us cheaply"""
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            kernel32 = ctypes.windll.kernel32
+            # PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ
+            handle = kernel32.GetCurrentProcess() if pid is None else kernel32.OpenProcess(0x1010, False, pid)
+            if not handle:
+                return 0
+            try:
+                if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                    return counters.WorkingSetSize
+            finally:
+                if pid is not None:
+                    kernel32.CloseHandle(handle)
+        except Exception:
+            pass
+        return 0
+    try:
+        with open(f"/proc/{'self' if pid is None else pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_parents():
+    """{pid: parent pid} for every running process ({} where the platform doesn't tell us cheaply)"""
+    parents = {}
+    if sys.platform == "win32":
         try:
-            from shutil import copyfile
-            copyfile(src_pdf, dst_pdf)
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESSENTRY32W(ctypes.Structure):
+                _fields_ = [("dwSize", wintypes.DWORD), ("cntUsage", wintypes.DWORD),
+                            ("th32ProcessID", wintypes.DWORD), ("th32DefaultHeapID", ctypes.c_size_t),
+                            ("th32ModuleID", wintypes.DWORD), ("cntThreads", wintypes.DWORD),
+                            ("th32ParentProcessID", wintypes.DWORD), ("pcPriClassBase", ctypes.c_long),
+                            ("dwFlags", wintypes.DWORD), ("szExeFile", ctypes.c_wchar * 260)]
+
+            kernel32 = ctypes.windll.kernel32
+            kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+            snapshot = kernel32.CreateToolhelp32Snapshot(0x2, 0)  # TH32CS_SNAPPROCESS
+            entry = PROCESSENTRY32W()
+            entry.dwSize = ctypes.sizeof(entry)
+            try:
+                more = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+                while more:
+                    parents[entry.th32ProcessID] = entry.th32ParentProcessID
+                    more = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+            finally:
+                kernel32.CloseHandle(snapshot)
         except Exception:
             pass
+        return parents
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return parents
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # "pid (comm) state ppid ..." - comm may contain spaces and parentheses
+                parents[int(name)] = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+    return parents
+
+
+def process_tree(pid):
+    """pid and all of its descendants"""
+    children = {}
+    for child, parent in process_parents().items():
+        children.setdefault(parent, []).append(child)
+    tree, todo = [], [pid]
+    while todo:
+        current = todo.pop()
+        if current in tree:
+            continue
+        tree.append(current)
+        todo.extend(children.get(current, ()))
+    return tree
+
+
+def kill_process_tree(pid):
+    """Terminate pid and everything it started (soffice.exe runs soffice.bin, for one)"""
+    for member in reversed(process_tree(pid)):
+        try:
+            os.kill(member, getattr(signal, "SIGKILL", signal.SIGTERM))  # TerminateProcess on Windows
+        except OSError:
+            pass
 
 
-def optimize_timesheet_orientation(src_pdf, dst_pdf):
-    """Specifically optimize timesheet orientation for better alignment with invoices"""
+def window_process_id(window_class, title):
+    """Process that owns the top-level window with this class and title (Windows), or None"""
     try:
-        reader = PdfReader(src_pdf)
-        writer = PdfWriter()
-        for page in reader.pages:
+        import ctypes
+        from ctypes import wintypes
+        hwnd = ctypes.windll.user32.FindWindowW(window_class, title)
+        if not hwnd:
+            return None
+        pid = wintypes.DWORD()
+        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        return pid.value or None
+    except Exception:
+        return None
+
+
+# Converter applications (Word, soffice) started by the job running in this process, and the
+# pipe to the supervisor when this is an isolated worker
+_converter_pids = []
+_converter_conn = None
+
+
+def register_converter_process(pid):
+    """Tie an external converter application to the current job: it counts against the worker's
+    memory cap and is killed along with the worker"""
+    _converter_pids.append(pid)
+    if _converter_conn is not None:
+        _converter_conn.send(("converter", pid))
+
+
+# Progress callback of the job running inline on this thread (see _run_inline)
+_inline_progress = threading.local()
+
+
+def report_conversion_progress():
+    """Tell the supervisor the current job finished another piece of work (a document of a
+    Word batch or a merge), which gives it a fresh time budget and moves the caller's progress"""
+    if _converter_conn is not None:
+        _converter_conn.send(("progress", None))
+    elif getattr(_inline_progress, "callback", None) is not None:
+        _inline_progress.callback()
+
+
+def converter_memory():
+    """Resident memory of the current job's converter applications and their child processes"""
+    return sum(process_memory(member) for pid in list(_converter_pids) for member in process_tree(pid))
+
+
+class PeakMemoryMonitor:
+    """Samples process memory on a daemon thread for the length of a run; peak() is the highest seen"""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self._peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._peak = process_memory()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, process_memory())
+
+    def stop(self):
+        self._stop.set()
+        self._peak = max(self._peak, process_memory())
+        return self._peak
+
+    def report(self):
+        return f"Peak memory: {self._peak / 1048576:.0f} MB"
+
+
+OUTPUT_PROFILES = {
+    "fast":     {"flate_level": 0, "recompress": False, "object_streams": False, "xref_stream": False},
+    "balanced": {"flate_level": 6, "recompress": False, "object_streams": False, "xref_stream": True},
+    "smallest": {"flate_level": 9, "recompress": True,  "object_streams": True,  "xref_stream": True},
+}
+# Objects per object stream in the "smallest" profile
+OBJECT_STREAM_SIZE = 100
+
+
+def output_profile():
+    """Settings for OUTPUT_PROFILE from the config; "balanced" if it isn't one of the known names"""
+    name = OUTPUT_PROFILE if OUTPUT_PROFILE in OUTPUT_PROFILES else "balanced"
+    return dict(OUTPUT_PROFILES[name], name=name)
+
+
+class StreamingPdfWriter:
+    """Writes a merged PDF object by object as pages are added, instead of holding the whole result.
+
+    Each page and everything it references is copied out of its source reader, renumbered,
+    written straight to the output file, and dropped from the reader's cache. Objects with
+    identical bytes are written once, across documents too. Memory stays around the size
+    of the largest single object, however big the inputs are.
+
+    The output profile decides whether uncompressed streams get Flate, whether small
+    objects are packed into object streams and whether the xref is a table or a stream.
+    """
+
+    def __init__(self, out, profile=None):
+        self.out = out
+        profile = profile or output_profile()
+        self._level = profile["flate_level"]
+        self._recompress = profile["recompress"]
+        self._objstm = profile["object_streams"]
+        self._xref_stream = profile["xref_stream"] or self._objstm
+        self._packed = []     # (number, bytes) waiting for the next object stream
+        self._in_objstm = {}  # number -> (object stream number, index)
+        self._offsets = {}
+        self._next_num = 3  # 1 = catalog, 2 = page tree root
+        self._kids = []
+        self._later = deque()
+        self._reader = None
+        self._shared = {}  # sha256 of a written object's bytes -> its number, across all documents
+        self.deduped = 0
+        self.dedup_bytes = 0
+        out.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def _alloc(self):
+        num = self._next_num
+        self._next_num += 1
+        return num
+
+    def _write_obj(self, num, obj):
+        body = io.BytesIO()
+        obj.write_to_stream(body, None)
+        self._write_body(num, body.getvalue(), isinstance(obj, StreamObject))
+
+    def _write_body(self, num, body, is_stream):
+        if self._objstm and not is_stream:
+            self._packed.append((num, body))
+            if len(self._packed) >= OBJECT_STREAM_SIZE:
+                self._flush_objstm()
+            return
+        self._offsets[num] = self.out.tell()
+        self.out.write(f"{num} 0 obj\n".encode("ascii"))
+        self.out.write(body)
+        self.out.write(b"\nendobj\n")
+
+    def _write_stream(self, num, head, data):
+        """A Flate stream object straight from bytes; head is the dictionary entries besides Filter/Length"""
+        self._offsets[num] = self.out.tell()
+        self.out.write(f"{num} 0 obj\n<< {head} /Filter /FlateDecode /Length {len(data)} >>\nstream\n".encode("ascii"))
+        self.out.write(data)
+        self.out.write(b"\nendstream\nendobj\n")
+
+    def _flush_objstm(self):
+        if not self._packed:
+            return
+        num = self._alloc()
+        index, bodies, at = [], [], 0
+        for i, (packed, body) in enumerate(self._packed):
+            index.append(f"{packed} {at}")
+            bodies.append(body)
+            at += len(body) + 1
+            self._in_objstm[packed] = (num, i)
+        head = (" ".join(index) + "\n").encode("ascii")
+        data = zlib.compress(head + b"\n".join(bodies), max(self._level, 1))
+        self._write_stream(num, f"/Type /ObjStm /N {len(self._packed)} /First {len(head)}", data)
+        self._packed = []
+
+    def _compress(self, stream):
+        """Flate for an unfiltered stream (or a tighter Flate when recompressing), if it comes out smaller"""
+        if not self._level:
+            return
+        data = stream._data
+        filters = stream.get("/Filter")
+        if filters is None:
+            packed = zlib.compress(data, self._level)
+        elif self._recompress and filters == "/FlateDecode" and "/DecodeParms" not in stream:
             try:
-                w = float(page.mediabox.width)
-                h = float(page.mediabox.height)
-                
-                # Enhanced timesheet orientation logic for perfect alignment
-                if w > h:
-                    # Landscape page - rotate to portrait for better alignment
-                    page.rotate(90)
-                elif w > h * 1.2:
-                    # Wide page - likely a timesheet that needs rotation
-                    page.rotate(90)
-                elif w < h * 0.8:
-                    # Very tall page - might need rotation
-                    page.rotate(90)
-                # For standard A4/Letter ratios, keep as-is for perfect alignment
-                    
+                packed = zlib.compress(zlib.decompress(data), self._level)
+            except zlib.error:
+                return
+        else:
+            return
+        if len(packed) < len(data):
+            stream._data = packed
+            stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+
+    def _copy(self, obj, refs, inflight, depth):
+        """obj with every indirect reference renumbered into this file (targets are written first)"""
+        if isinstance(obj, IndirectObject):
+            return IndirectObject(self._emit(obj, refs, inflight, depth + 1), 0, None)
+        if isinstance(obj, StreamObject):
+            copy = type(obj)()
+            copy._data = obj._data
+            for k, v in obj.items():
+                copy[k] = self._copy(v, refs, inflight, depth)
+            self._compress(copy)
+            return copy
+        if isinstance(obj, DictionaryObject):
+            copy = DictionaryObject()
+            for k, v in obj.items():
+                copy[k] = self._copy(v, refs, inflight, depth)
+            return copy
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy(v, refs, inflight, depth) for v in obj)
+        return obj
+
+    def _emit(self, ref, refs, inflight, depth):
+        """Output number for a source object, writing it (and what it references) if it isn't out yet.
+
+        Referenced objects are written before their referrers, so an object's bytes are
+        final when it's hashed: one identical to something already written - the same
+        font, logo or form background in another client document - is not written
+        again, and its referrers point at the first copy instead.
+        """
+        key = (ref.idnum, ref.generation)
+        num = refs.get(key)
+        if num is not None:
+            return num
+        if key in inflight or depth > 64:
+            # A reference cycle (or a very deep chain): fix the number now, write the object unshared
+            num = inflight.get(key) or self._alloc()
+            if key in inflight:
+                inflight[key] = num
+            else:
+                refs[key] = num
+                self._later.append(ref)
+            return num
+        inflight[key] = None
+        copy = self._copy(ref.get_object(), refs, inflight, depth)
+        self._reader.resolved_objects.pop((ref.generation, ref.idnum), None)
+        fixed = inflight.pop(key)
+        body = io.BytesIO()
+        copy.write_to_stream(body, None)
+        body = body.getvalue()
+        if fixed is None:
+            digest = hashlib.sha256(body).digest()
+            num = self._shared.get(digest)
+            if num is not None:
+                refs[key] = num
+                self.deduped += 1
+                self.dedup_bytes += len(body)
+                return num
+            num = self._alloc()
+            self._shared[digest] = num
+        else:
+            num = fixed
+        refs[key] = num
+        self._write_body(num, body, isinstance(copy, StreamObject))
+        return num
+
+    def add_document(self, doc):
+        """Write every page of a PreparedDoc (rotations applied) and what they use"""
+        try:
+            return self._add_pages(doc.reader(), list(doc.pages()))
+        finally:
+            doc.close()
+            self._reader = None
+
+    def _add_pages(self, reader, pages):
+        self._reader = reader
+        # Numbers for the pages first, so links and annotations pointing at pages resolve to them
+        refs = {}
+        for page in pages:
+            ref = page.indirect_reference
+            num = self._alloc()
+            if ref is not None:
+                refs[(ref.idnum, ref.generation)] = num
+            self._kids.append(num)
+        for page, num in zip(pages, self._kids[-len(pages):]):
+            body = DictionaryObject()
+            for k, v in page.items():
+                if k != "/Parent":
+                    body[NameObject(k)] = self._copy(v, refs, {}, 0)
+            body[NameObject("/Parent")] = IndirectObject(2, 0, None)
+            self._write_obj(num, body)
+            while self._later:
+                ref = self._later.popleft()
+                self._write_obj(refs[(ref.idnum, ref.generation)], self._copy(ref.get_object(), refs, {}, 0))
+        return len(pages)
+
+    def close(self):
+        """Page tree, catalog, xref and trailer"""
+        kids = ArrayObject(IndirectObject(num, 0, None) for num in self._kids)
+        self._write_obj(2, DictionaryObject({NameObject("/Type"): NameObject("/Pages"),
+                                             NameObject("/Kids"): kids,
+                                             NameObject("/Count"): NumberObject(len(self._kids))}))
+        self._write_obj(1, DictionaryObject({NameObject("/Type"): NameObject("/Catalog"),
+                                             NameObject("/Pages"): IndirectObject(2, 0, None)}))
+        self._flush_objstm()
+        if self._xref_stream:
+            self._close_with_xref_stream()
+            return
+        xref_at = self.out.tell()
+        size = self._next_num
+        self.out.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode("ascii"))
+        for num in range(1, size):
+            offset = self._offsets.get(num)
+            entry = f"{offset:010d} 00000 n \n" if offset is not None else "0000000000 65535 f \n"
+            self.out.write(entry.encode("ascii"))
+        self.out.write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode("ascii"))
+
+    def _close_with_xref_stream(self):
+        """Cross-reference stream (PDF 1.5): binary rows, Flate-compressed, and able to point into object streams"""
+        num = self._alloc()
+        xref_at = self.out.tell()
+        self._offsets[num] = xref_at
+        size = self._next_num
+        width = max(4, (max(xref_at, size).bit_length() + 7) // 8)
+        rows = [b"\x00" + bytes(width) + b"\xff\xff"]
+        for n in range(1, size):
+            offset = self._offsets.get(n)
+            if offset is not None:
+                rows.append(b"\x01" + offset.to_bytes(width, "big") + b"\x00\x00")
+            elif n in self._in_objstm:
+                stm, i = self._in_objstm[n]
+                rows.append(b"\x02" + stm.to_bytes(width, "big") + i.to_bytes(2, "big"))
+            else:
+                rows.append(b"\x00" + bytes(width) + b"\x00\x00")
+        data = zlib.compress(b"".join(rows), max(self._level, 1))
+        self._write_stream(num, f"/Type /XRef /Size {size} /W [1 {width} 2] /Root 1 0 R", data)
+        self.out.write(f"startxref\n{xref_at}\n%%EOF\n".encode("ascii"))
+
+
+class PdfEngine(ABC):
+    """The PDF operations a merge needs: page geometry, rotate + append pages, write.
+
+    open_writer(out, profile) returns an object with add_document(doc) - which appends a
+    PreparedDoc's pages with its rotations applied and closes the doc - and close(),
+    which finishes the file with the output profile's settings (OUTPUT_PROFILE if None).
+    """
+    name = "none"
+
+    def available(self):
+        return False
+
+    @abstractmethod
+    def page_geometry(self, src_pdf):
+        ...
+
+    @abstractmethod
+    def open_writer(self, out, profile=None):
+        ...
+
+
+class PyPDF2Engine(PdfEngine):
+    """Pure Python (PyPDF2); geometry by seeking through the file, output via StreamingPdfWriter"""
+    name = "pypdf2"
+
+    def available(self):
+        return True
+
+    def page_geometry(self, src_pdf):
+        # The reader works on an open file, so only the xref, the page tree and the page
+        # dictionaries are read - content streams and images are never touched
+        with (io.BytesIO(src_pdf) if isinstance(src_pdf, bytes) else open(src_pdf, "rb")) as f:
+            return [page_geometry(page) for page in PdfReader(f).pages]
+
+    def open_writer(self, out, profile=None):
+        return StreamingPdfWriter(out, profile)
+
+
+class PikePdfWriter:
+    """Merge writer on qpdf: pages are copied lazily, so sources stay open until the file is saved"""
+
+    def __init__(self, out, profile=None):
+        self.out = out
+        self.profile = profile or output_profile()
+        self.pdf = pikepdf.new()
+        self._sources = []
+        self.deduped = 0
+        self.dedup_bytes = 0
+
+    def add_document(self, doc):
+        try:
+            src = pikepdf.open(io.BytesIO(doc.pdf) if isinstance(doc.pdf, bytes) else doc.pdf)
+            self._sources.append(src)
+            start = len(self.pdf.pages)
+            self.pdf.pages.extend(src.pages)
+            for i, angle in enumerate(doc.rotations or []):
+                if angle and start + i < len(self.pdf.pages):
+                    self.pdf.pages[start + i].rotate(angle, relative=True)
+            return len(src.pages)
+        finally:
+            doc.close()
+
+    def _share_identical_streams(self):
+        """Point every reference to a duplicate stream at the first copy; qpdf drops the orphans on save.
+
+        Only streams (fonts, images, form XObjects) are compared - they are where the bytes are.
+        """
+        first = {}
+        duplicate = {}
+        for obj in self.pdf.objects:
+            if not isinstance(obj, pikepdf.Stream):
+                continue
+            data = obj.read_raw_bytes()
+            head = pikepdf.Dictionary({k: v for k, v in obj.stream_dict.items() if k != "/Length"})
+            digest = hashlib.sha256(head.unparse() + b"\0" + data).digest()
+            kept = first.setdefault(digest, obj)
+            if kept.objgen != obj.objgen:
+                duplicate[obj.objgen] = kept
+                self.deduped += 1
+                self.dedup_bytes += len(data)
+        if not duplicate:
+            return
+
+        def relink(container):
+            keys = container.keys() if isinstance(container, (pikepdf.Dictionary, pikepdf.Stream)) \
+                else range(len(container))
+            for k in keys:
+                value = container[k]
+                if not isinstance(value, pikepdf.Object):
+                    continue  # numbers, booleans and the like come back as Python values
+                if value.is_indirect:
+                    kept = duplicate.get(value.objgen)
+                    if kept is not None:
+                        container[k] = kept
+                elif isinstance(value, (pikepdf.Dictionary, pikepdf.Array)):
+                    relink(value)
+
+        for obj in self.pdf.objects:
+            if isinstance(obj, (pikepdf.Dictionary, pikepdf.Array, pikepdf.Stream)):
+                relink(obj)
+
+    def close(self):
+        try:
+            self._share_identical_streams()
+            level = self.profile["flate_level"]
+            if level:
+                pikepdf.settings.set_flate_compression_level(level)
+            # qpdf only writes an xref stream along with object streams, so "balanced" keeps the table
+            self.pdf.save(self.out, compress_streams=bool(level), recompress_flate=self.profile["recompress"],
+                          object_stream_mode=pikepdf.ObjectStreamMode.generate if self.profile["object_streams"]
+                          else pikepdf.ObjectStreamMode.disable)
+        finally:
+            self.pdf.close()
+            for src in self._sources:
+                src.close()
+
+
+class PikePdfEngine(PdfEngine):
+    """qpdf (C++) through pikepdf - optional, much faster on large scans"""
+    name = "pikepdf"
+
+    def available(self):
+        return pikepdf is not None
+
+    def page_geometry(self, src_pdf):
+        with pikepdf.open(io.BytesIO(src_pdf) if isinstance(src_pdf, bytes) else src_pdf) as pdf:
+            geometry = []
+            # qpdf pushes inherited MediaBox/Rotate down to the pages it hands out
+            for page in pdf.pages:
+                x0, y0, x1, y1 = (float(v) for v in page.mediabox)
+                geometry.append((abs(x1 - x0), abs(y1 - y0), int(page.obj.get("/Rotate", 0)) % 360))
+            return geometry
+
+    def open_writer(self, out, profile=None):
+        return PikePdfWriter(out, profile)
+
+
+PDF_ENGINES = {
+    "pypdf2": PyPDF2Engine,
+    "pikepdf": PikePdfEngine,
+}
+
+_pdf_engine = None
+
+
+def get_pdf_engine():
+    """The PDF_ENGINE from the config; PyPDF2 if the chosen one isn't installed"""
+    global _pdf_engine
+    if _pdf_engine is None:
+        engine = PDF_ENGINES.get(PDF_ENGINE, PyPDF2Engine)()
+        _pdf_engine = engine if engine.available() else PyPDF2Engine()
+    return _pdf_engine
+
+
+def benchmark_pdf_engines(pdf_paths, repeat=3):
+    """Best-of-`repeat` seconds per operation for each installed engine over pdf_paths.
+
+    Returns {engine: {"geometry": s, "rotate+append": s, "write": s, "merge": s}}. Every
+    page is turned 90 degrees so the rotate path is exercised; output goes to a local temp
+    file. The PyPDF2 writer streams objects out as pages are appended, so for it most of
+    the writing shows up under rotate+append - compare engines on "merge" (the two together).
+    """
+    results = {}
+    for name, cls in PDF_ENGINES.items():
+        engine = cls()
+        if not engine.available():
+            continue
+        best = {}
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            geometry = [engine.page_geometry(p) for p in pdf_paths]
+            t1 = time.perf_counter()
+            fd, tmp = tempfile.mkstemp(suffix=".pdf")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    writer = engine.open_writer(f)
+                    for p, pages in zip(pdf_paths, geometry):
+                        writer.add_document(PreparedDoc(p, p, [90] * len(pages)))
+                    t2 = time.perf_counter()
+                    writer.close()
+                    t3 = time.perf_counter()
+            finally:
+                os.remove(tmp)
+            for op, secs in (("geometry", t1 - t0), ("rotate+append", t2 - t1), ("write", t3 - t2), ("merge", t3 - t1)):
+                best[op] = min(best.get(op, secs), secs)
+        results[name] = best
+    return results
+
+
+def print_pdf_benchmark(folders):
+    """`python 115.py --benchmark-pdf FOLDER...`: time each engine on the PDFs found under the folders"""
+    paths = []
+    for folder in folders:
+        for root, _, names in os.walk(folder):
+            paths.extend(os.path.join(root, n) for n in sorted(names) if n.lower().endswith(".pdf"))
+    paths = [p for p in paths if pdf_preflight(p, os.path.getsize(p)).usable]
+    if not paths:
+        print("No readable PDFs found.")
+        return
+    mb = sum(os.path.getsize(p) for p in paths) / 1048576
+    print(f"{len(paths)} PDFs, {mb:.1f} MB")
+    results = benchmark_pdf_engines(paths)
+    base = results.get("pypdf2", {})
+    for name, ops in results.items():
+        for op, secs in ops.items():
+            speedup = f"  x{base[op] / secs:.2f}" if name != "pypdf2" and secs > 0 and op in base else ""
+            print(f"{name:8} {op:14} {secs * 1000:9.1f} ms{speedup}")
+
+
+def write_pdf_file(path, docs, profile, engine_name):
+    """Stream every prepared doc's pages into a local file, one source at a time (runs in a worker).
+
+    engine_name is the caller's engine, so the worker never writes with a different one.
+    Reports progress after each doc, and returns (objects deduped, bytes that saved).
+    """
+    with open(path, "wb") as f:
+        writer = PDF_ENGINES[engine_name]().open_writer(f, profile)
+        for doc in docs:
+            try:
+                writer.add_document(doc)
+            finally:
+                doc.close()  # the source's reader and file go as soon as its pages are out
+            report_conversion_progress()
+        writer.close()
+    return writer.deduped, writer.dedup_bytes
+
+
+def write_merged_pdf(out_path, docs, on_progress=None):
+    """Write the merged PDF to a local file in an isolated worker, then copy it to the share.
+
+    The worker parses every source again, so a PDF that hangs the parser or eats memory
+    is killed like any conversion - CONVERT_TIMEOUT per document, CONVERT_MEMORY_MB -
+    instead of stalling the run; the merge then fails with ConversionAborted.
+    Returns {"bytes": output size, "profile": output profile name, "write_seconds": time to
+    write the local file, "copy_seconds": time to copy it to the share, "deduped": objects
+    written once instead of again, "dedup_bytes": bytes that saved}.
+    """
+    os.makedirs(local_cache_root, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix="merge_", suffix=".pdf", dir=local_cache_root)
+    os.close(fd)
+    profile = output_profile()
+    written = 0
+
+    def progress():
+        nonlocal written
+        written += 1
+        if on_progress:
+            on_progress(min(written, len(docs)), len(docs))  # a retried attempt counts again
+
+    try:
+        t0 = time.perf_counter()
+        job = (tmp, list(docs), profile, get_pdf_engine().name)
+        deduped, dedup_bytes = run_isolated("merge", job, on_progress=progress)
+        t1 = time.perf_counter()
+        size = os.path.getsize(tmp)
+        copy_file_chunked(tmp, out_path, "write", size)
+        return {"bytes": size, "profile": profile["name"], "write_seconds": t1 - t0,
+                "copy_seconds": time.perf_counter() - t1,
+                "deduped": deduped, "dedup_bytes": dedup_bytes}
+    finally:
+        for doc in docs:
+            doc.close()
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def log_merge_result(logger, result):
+    """Log a merge's output size and write time, and what writing shared resources once saved"""
+    logger.log(f"Output ({result['profile']}): {result['bytes'] / 1048576:.1f} MB written in "
+               f"{result['write_seconds']:.1f}s, {result['copy_seconds']:.1f}s to copy to the share", "info")
+    if result["deduped"]:
+        logger.log(f"Shared resources: {result['deduped']} duplicate objects written once "
+                   f"(saved {result['dedup_bytes'] / 1048576:.1f} MB)", "info")
+
+
+RAW_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".docx", ".doc")
+
+
+def scan_folder_entries(path):
+    """One os.scandir pass over a folder -> sorted [name, is_dir, size, mtime] entries"""
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    entries.append([entry.name, True, 0, 0.0])
+                elif entry.is_file():
+                    st = entry.stat()
+                    entries.append([entry.name, False, st.st_size, st.st_mtime])
+            except OSError:
+                continue
+    entries.sort()
+    return entries
+
+
+class DirectoryIndex:
+    """SQLite cache of folder listings under main_folder.
+
+    A listing is only re-read from the share when the folder's mtime changes, and
+    resolved client/week folders are remembered so a repeat lookup costs one stat.
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock, self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS listings (path TEXT PRIMARY KEY, mtime REAL, entries TEXT)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS weeks (client_root TEXT, week TEXT, path TEXT, PRIMARY KEY (client_root, week))")
+
+    def listing(self, path, mtime=None):
+        """Return [name, is_dir, size, mtime] entries for a folder (raises OSError if it is gone)"""
+        if mtime is None:
+            mtime = share_io("stat", os.stat, path).st_mtime
+        with self._lock:
+            row = self.conn.execute("SELECT mtime, entries FROM listings WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == mtime:
+            return json.loads(row[1])
+
+        entries = share_io("list", scan_folder_entries, path)
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO listings VALUES (?, ?, ?)", (path, mtime, json.dumps(entries)))
+        return entries
+
+    def find_week_folder(self, client_root, week_str):
+        target = f"Week {week_str}"
+        with self._lock:
+            row = self.conn.execute("SELECT path FROM weeks WHERE client_root = ? AND week = ?", (client_root, week_str)).fetchone()
+        if row:
+            if share_io("stat", os.path.isdir, row[0]):
+                return row[0]
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM weeks WHERE client_root = ? AND week = ?", (client_root, week_str))
+
+        for month_name, is_dir, _, _ in self.listing(client_root):
+            if not is_dir:
+                continue
+            month_path = os.path.join(client_root, month_name)
+            try:
+                month_entries = self.listing(month_path)
+            except OSError:
+                continue
+            if any(name == target and sub_dir for name, sub_dir, _, _ in month_entries):
+                week_path = os.path.join(month_path, target)
+                with self._lock, self.conn:
+                    self.conn.execute("INSERT OR REPLACE INTO weeks VALUES (?, ?, ?)", (client_root, week_str, week_path))
+                return week_path
+        return None
+
+
+def _open_index(index_cls):
+    try:
+        return index_cls(index_db)
+    except Exception as e:
+        print(f"{index_cls.__name__} unavailable, continuing without it: {e}")
+        return None
+
+
+dir_index = None  # opened by init_runtime()
+
+
+def find_week_folder(client_root, week_str):
+    if dir_index is not None:
+        try:
+            return dir_index.find_week_folder(client_root, week_str)
+        except OSError:
+            return None
+        except sqlite3.Error:
+            pass
+    return _walk_for_week_folder(client_root, week_str)
+
+
+def _walk_for_week_folder(client_root, week_str):
+    # Each listing and stat is its own scheduled operation - timing the whole walk as one
+    # would look like congestion to the scheduler on clients with many month folders
+    if not share_io("stat", os.path.isdir, client_root):
+        return None
+    target = f"Week {week_str}"
+    for month_name in sorted(share_io("list", os.listdir, client_root)):
+        week_path = os.path.join(client_root, month_name, target)
+        if share_io("stat", os.path.isdir, week_path):
+            return week_path
+    return None
+
+
+class FolderSnapshot:
+    """A week folder's listing captured once at scan time (names, sizes, mtimes).
+
+    prepare_files_for_merge revalidates it with one listing (refreshed()) and backup
+    moves the files from that validated listing, so a run lists the week folder twice:
+    at the scan and before the merge. It is always read straight from the folder -
+    never from the directory index, whose mtime check misses files overwritten in
+    place - and revalidation compares every file's size and mtime.
+    """
+
+    def __init__(self, folder, mtime, entries):
+        self.folder = folder
+        self.mtime = mtime
+        self.entries = entries
+
+    @classmethod
+    def capture(cls, folder):
+        mtime = share_io("stat", os.stat, folder).st_mtime
+        return cls(folder, mtime, share_io("list", scan_folder_entries, folder))
+
+    def _relist(self):
+        try:
+            return share_io("list", scan_folder_entries, self.folder)
+        except OSError:
+            return None
+
+    def is_current(self):
+        return self._relist() == self.entries
+
+    def refreshed(self):
+        """This snapshot if no file in the folder changed, otherwise a fresh one - from a single listing"""
+        entries = self._relist()
+        if entries == self.entries:
+            return self
+        if entries is None:
+            return FolderSnapshot.capture(self.folder)  # raises OSError if the folder is gone
+        return FolderSnapshot(self.folder, share_io("stat", os.stat, self.folder).st_mtime, entries)
+
+    def files(self):
+        return [(name, os.path.join(self.folder, name), size, mtime) for name, is_dir, size, mtime in self.entries if not is_dir]
+
+    def raw_files(self):
+        return [path for name, path, _, _ in self.files() if os.path.splitext(name)[1].lower() in RAW_EXTENSIONS]
+
+
+def is_merged_output(name):
+    """Merged invoices are saved as '<invoice>_.pdf', timesheet-only runs as '<client>_Week_MM-DD.pdf'"""
+    return name.lower().endswith(".pdf") and (name.endswith("_.pdf") or "_Week_" in name)
+
+
+class RecentMergesIndex:
+    """Persistent record of merged PDFs under main_folder, served newest-first without walking the share"""
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock, self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS recent_outputs (path TEXT PRIMARY KEY, client TEXT, week TEXT, mtime REAL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS recent_outputs_mtime ON recent_outputs (mtime)")
+
+    def record(self, path, client="", week_str="", mtime=None):
+        if mtime is None:
+            mtime = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO recent_outputs VALUES (?, ?, ?, ?)", (path, client, week_str, mtime))
+
+    def top(self, limit=10):
+        with self._lock:
+            return self.conn.execute("SELECT path, mtime FROM recent_outputs ORDER BY mtime DESC LIMIT ?", (limit,)).fetchall()
+
+    def reconcile(self):
+        """Pick up merged files created outside the tool and forget ones that were deleted.
+
+        Walks main_folder through the directory index, so folders whose mtime has
+        not changed since the last pass cost one stat each.
+        """
+        if not os.path.isdir(main_folder):
+            return 0  # share offline - keep what we have rather than forgetting everything
+        started = time.time()
+        found = []
+        for client, is_dir, _, _ in _list_folder(main_folder):
+            if not is_dir:
+                continue
+            client_root = os.path.join(main_folder, client)
+            for month, month_is_dir, _, _ in _list_folder(client_root):
+                if not month_is_dir:
+                    continue
+                month_path = os.path.join(client_root, month)
+                for week, week_is_dir, _, _ in _list_folder(month_path):
+                    if not week_is_dir:
+                        continue
+                    week_path = os.path.join(month_path, week)
+                    week_label = week[5:] if week.startswith("Week ") else week
+                    for name, name_is_dir, _, mtime in _list_folder(week_path):
+                        if not name_is_dir and is_merged_output(name):
+                            found.append((os.path.join(week_path, name), client, week_label, mtime))
+
+        with self._lock, self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM seen")
+            self.conn.executemany("INSERT OR IGNORE INTO seen VALUES (?)", [(f[0],) for f in found])
+            self.conn.executemany("INSERT OR REPLACE INTO recent_outputs VALUES (?, ?, ?, ?)", found)
+            self.conn.execute("DELETE FROM recent_outputs WHERE mtime < ? AND path NOT IN (SELECT path FROM seen)", (started,))
+        return len(found)
+
+
+def _list_folder(path):
+    """Folder entries via the directory index when available; [] if the folder is unreadable"""
+    try:
+        if dir_index is not None:
+            return dir_index.listing(path)
+        return share_io("list", scan_folder_entries, path)
+    except (OSError, sqlite3.Error):
+        return []
+
+
+recent_index = None  # opened by init_runtime()
+
+
+def record_recent_merge(path, client, week_str):
+    if recent_index is None:
+        return
+    try:
+        recent_index.record(path, client, week_str)
+    except sqlite3.Error:
+        pass
+
+
+class ReadAheadCache:
+    """Local copies of raw timesheets, pulled off the share in large sequential reads.
+
+    The scan queues every raw file of each week folder it finds; orientation,
+    conversion and merging then read the local copy, so each file crosses the
+    network once. Copies are keyed by source path + size + mtime.
+    """
+
+    def __init__(self, folder, workers=READAHEAD_WORKERS):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._by_source = {}
+        self._queue = queue.Queue()
+        for _ in range(workers):
+            threading.Thread(target=self._worker, daemon=True, name="readahead").start()
+        # Leftovers from runs that never reached backup
+        self.purge_older_than(2 * 24 * 3600)
+
+    def _local_path(self, path, size, mtime):
+        key = hashlib.sha1(f"{path}|{size}|{mtime}".encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, key + os.path.splitext(path)[1].lower())
+
+    def fetch(self, path, size, mtime):
+        """Local copy of path, copying it now unless it is already there or on its way"""
+        local = self._local_path(path, size, mtime)
+        while True:
+            with self._lock:
+                if os.path.isfile(local):
+                    self._by_source[path] = local
+                    return local
+                pending = self._pending.get(local)
+                if pending is None:
+                    pending = self._pending[local] = threading.Event()
+                    break
+            # Another thread is copying this file - wait for it instead of reading the share twice
+            pending.wait()
+
+        tmp = f"{local}.{threading.get_ident()}.part"
+        try:
+            copy_file_chunked(path, tmp, "read", size)
+            # A file still being written (or replaced since it was listed) must not be cached under this key
+            st = share_io("stat", os.stat, path)
+            if os.path.getsize(tmp) != size or (st.st_size, st.st_mtime) != (size, mtime):
+                raise OSError(f"{os.path.basename(path)} changed while it was being copied")
+            os.replace(tmp, local)
+            with self._lock:
+                self._by_source[path] = local
+            return local
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except Exception:
+                    pass
+            with self._lock:
+                self._pending.pop(local, None)
+            pending.set()
+
+    def prefetch(self, snapshot):
+        for name, path, size, mtime in snapshot.files():
+            if os.path.splitext(name)[1].lower() in RAW_EXTENSIONS:
+                self._queue.put((path, size, mtime))
+
+    def _worker(self):
+        while True:
+            path, size, mtime = self._queue.get()
+            try:
+                self.fetch(path, size, mtime)
+            except Exception:
+                pass  # the merge will read this one from the share instead
+
+    def release(self, paths):
+        for path in paths:
+            with self._lock:
+                local = self._by_source.pop(path, None)
+            if local:
+                try:
+                    os.remove(local)
+                except Exception:
+                    pass
+
+    def purge_older_than(self, seconds):
+        cutoff = time.time() - seconds
+        for entry in scan_folder_entries(self.folder):
+            if not entry[1] and entry[3] < cutoff:
+                try:
+                    os.remove(os.path.join(self.folder, entry[0]))
+                except Exception:
+                    pass
+
+
+read_ahead = None  # started by init_runtime()
+
+
+def local_copy(path, size, mtime):
+    """Read path from local disk when possible (fetching it once), else from the share"""
+    if read_ahead is None:
+        return path
+    try:
+        return read_ahead.fetch(path, size, mtime)
+    except OSError:
+        return path
+
+
+class ScanCache:
+    """Recent discover_client results keyed by (client, week).
+
+    An entry younger than the TTL is returned without touching the share; an older
+    one costs a listing of the week folder and is only rescanned if a file in it changed.
+    """
+
+    def __init__(self, ttl=SCAN_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, client, week_str, max_age=None):
+        key = (client, week_str)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        checked, week_path, snapshot = entry
+        if time.time() - checked <= (self.ttl if max_age is None else max_age):
+            return week_path, snapshot
+        if snapshot is not None and snapshot.is_current():
+            with self._lock:
+                self._entries[key] = (time.time(), week_path, snapshot)
+            return week_path, snapshot
+        with self._lock:
+            self._entries.pop(key, None)
+        return None
+
+    def put(self, client, week_str, week_path, snapshot):
+        with self._lock:
+            self._entries[(client, week_str)] = (time.time(), week_path, snapshot)
+
+    def invalidate(self, client, week_str):
+        with self._lock:
+            self._entries.pop((client, week_str), None)
+
+
+scan_cache = ScanCache()
+
+
+class PdfCheck:
+    """Outcome of the structural pre-flight for one PDF.
+
+    status is "ok", "suspect" (structurally off - a wrong startxref offset, junk before
+    the header or after %%EOF - but PyPDF2's tolerant parser opens it, so it is merged),
+    "encrypted" (opens with the empty password and its streams decrypt, so it merges),
+    "locked" (needs a password, or uses AES without PyCryptodome installed), "empty" or
+    "corrupt" (the parser can't open it either). pages is None when the page count sits
+    in a compressed object stream and isn't cheap to read.
+    """
+
+    __slots__ = ("status", "reason", "pages")
+
+    def __init__(self, status, reason=None, pages=None):
+        self.status = status
+        self.reason = reason
+        self.pages = pages
+
+    @property
+    def usable(self):
+        return self.status in ("ok", "suspect", "encrypted")
+
+    def describe(self):
+        return self.reason or self.status
+
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_REF = rb"\s+(\d+)\s+(\d+)\s+R"
+
+
+def _classic_xref_offset(f, xref_at, num):
+    """Byte offset of object num from the classic xref table at xref_at (and its /Prev chain), or None"""
+    for _ in range(32):  # incremental updates, with a guard against /Prev loops
+        f.seek(xref_at)
+        if f.read(4) != b"xref":
+            return None
+        pos = xref_at + 4
+        while True:
+            f.seek(pos)
+            line = f.read(64)
+            m = re.match(rb"\s*(\d+)\s+(\d+)\s*?(?:\r\n|\r|\n| \r| \n)", line)
+            if not m:
+                break
+            start, count = int(m.group(1)), int(m.group(2))
+            entries_at = pos + m.end()
+            if start <= num < start + count:
+                f.seek(entries_at + (num - start) * 20)
+                entry = f.read(20)
+                if entry[17:18] == b"n":
+                    return int(entry[:10])
+                return None
+            pos = entries_at + count * 20
+        f.seek(pos)
+        trailer = f.read(2048)
+        prev = re.search(rb"/Prev\s+(\d+)", trailer)
+        if not prev:
+            return None
+        xref_at = int(prev.group(1))
+    return None
+
+
+def _object_head(f, offset, num):
+    f.seek(offset)
+    head = f.read(4096)
+    return head if re.match(rb"\s*%d\s+\d+\s+obj" % num, head) else None
+
+
+def _decryption_check(f, reason, pages=None):
+    """Verdict for an encrypted PDF: "encrypted" (usable) only if it opens with the empty password
+    and a content stream actually decrypts - the page tree alone decrypts without PyCryptodome,
+    AES streams don't, and the merge copies streams"""
+    f.seek(0)
+    try:
+        reader = PdfReader(f, strict=False)
+        if reader.is_encrypted and not reader.decrypt(""):
+            return PdfCheck("locked", "encrypted PDF that needs a password", pages)
+        if len(reader.pages):
+            contents = reader.pages[0].get_contents()
+            if contents is not None:
+                contents.get_data()
+        pages = len(reader.pages)
+    except Exception as e:
+        return PdfCheck("locked", f"encrypted PDF that can't be decrypted here: {e}", pages)
+    if pages == 0:
+        return PdfCheck("empty", "the PDF has no pages", 0)
+    return PdfCheck("encrypted", reason, pages)
+
+
+def _tolerant_parse(f, problem):
+    """Verdict for a structurally odd PDF: "suspect" if PyPDF2 (which repairs broken xrefs) opens it"""
+    f.seek(0)
+    try:
+        reader = PdfReader(f, strict=False)
+        if reader.is_encrypted:
+            return _decryption_check(f, f"encrypted PDF; {problem}")
+        pages = len(reader.pages)
+    except Exception as e:
+        return PdfCheck("corrupt", f"{problem}; unreadable: {e}")
+    if pages == 0:
+        return PdfCheck("empty", "the PDF has no pages", 0)
+    return PdfCheck("suspect", f"{problem} - repaired on reading", pages)
+
+
+def pdf_preflight(path, size):
+    """Cheap structural check of a PDF: a few small reads at the start and end of the file.
+
+    Header, %%EOF and startxref, an xref table or stream where startxref points, the
+    encryption flag, and - for classic xref tables - the page count from the root /Pages.
+    Only a file that fails one of those is parsed, by the same tolerant parser the merge
+    uses, and only a file that parser can't open either (or an empty one) is rejected.
+    Encrypted files are parsed too, to find out whether they decrypt.
+    """
+    if size == 0:
+        return PdfCheck("empty", "the file is empty", 0)
+    try:
+        with open(path, "rb") as f:
+            if b"%PDF-" not in f.read(1024):
+                return _tolerant_parse(f, "no %PDF header")
+            f.seek(max(0, size - 2048))
+            tail = f.read()
+            if b"%%EOF" not in tail:
+                return _tolerant_parse(f, "no %%EOF at the end")
+            starts = _STARTXREF.findall(tail)
+            if not starts or int(starts[-1]) >= size:
+                return _tolerant_parse(f, "startxref missing or past the end of the file")
+            xref_at = int(starts[-1])
+            f.seek(xref_at)
+            at_xref = f.read(2048)
+            classic = at_xref.startswith(b"xref")
+            if not classic and not re.match(rb"\s*\d+\s+\d+\s+obj\s*<<.*?/Type\s*/XRef", at_xref, re.S):
+                return _tolerant_parse(f, "startxref doesn't point at a cross-reference table")
+            if classic:
+                trailer_at = tail.rfind(b"trailer")
+                trailer = tail[trailer_at:] if trailer_at >= 0 else b""
+            else:
+                trailer = at_xref
+            encrypted = b"/Encrypt" in trailer
+            pages = None
+            root = re.search(rb"/Root" + _REF, trailer)
+            if classic and root:
+                root_num = int(root.group(1))
+                root_at = _classic_xref_offset(f, xref_at, root_num)
+                catalog = _object_head(f, root_at, root_num) if root_at is not None else None
+                tree = re.search(rb"/Pages" + _REF, catalog) if catalog else None
+                if tree:
+                    tree_num = int(tree.group(1))
+                    tree_at = _classic_xref_offset(f, xref_at, tree_num)
+                    node = _object_head(f, tree_at, tree_num) if tree_at is not None else None
+                    count = re.search(rb"/Count\s+(\d+)", node) if node else None
+                    if count:
+                        pages = int(count.group(1))
+            if pages == 0:
+                return PdfCheck("empty", "the PDF has no pages", 0)
+            if encrypted:
+                return _decryption_check(f, "encrypted PDF", pages)
+            return PdfCheck("ok", None, pages)
+    except OSError as e:
+        return PdfCheck("corrupt", f"unreadable: {e}")
+
+
+class PdfPreflightCache:
+    """Pre-flight results by (path, size, mtime), filled during the scan and consulted by the merge"""
+
+    def __init__(self):
+        self._checks = {}
+        self._lock = threading.Lock()
+
+    def check(self, path, size, mtime, local_path=None):
+        key = (path, size, mtime)
+        with self._lock:
+            found = self._checks.get(key)
+        if found is not None:
+            return found
+        if local_path is not None and local_path != path:
+            found = pdf_preflight(local_path, size)
+        else:
+            found = share_io("read", pdf_preflight, path, size)
+        with self._lock:
+            self._checks[key] = found
+        return found
+
+    def check_snapshot(self, snapshot):
+        """Pre-flight every PDF in a week folder listing; returns [(name, PdfCheck)] for the flagged ones"""
+        flagged = []
+        for name, path, size, mtime in snapshot.files():
+            if os.path.splitext(name)[1].lower() == ".pdf" and not is_merged_output(name):
+                found = self.check(path, size, mtime)
+                if found.status != "ok":
+                    flagged.append((name, found))
+        return flagged
+
+
+pdf_checks = PdfPreflightCache()
+
+
+def discover_client(client, week_str, fresh=False):
+    """Resolve one client's week folder and snapshot its listing (runs in a scan worker).
+
+    fresh=True skips the TTL shortcut but still reuses an entry whose folder mtime is unchanged.
+    """
+    cached = scan_cache.get(client, week_str, max_age=0 if fresh else None)
+    if cached is not None:
+        return (client,) + cached
+
+    client_root = os.path.join(main_folder, client)
+    week_path = find_week_folder(client_root, week_str)
+    snapshot = None
+    if week_path:
+        try:
+            snapshot = FolderSnapshot.capture(week_path)
+        except OSError:
+            week_path = None
+    if snapshot is not None and read_ahead is not None:
+        # Start pulling the raw files to local disk while the rest of the scan runs
+        read_ahead.prefetch(snapshot)
+    if snapshot is not None:
+        # Structural pre-flight of every PDF, so bad ones are known before any conversion starts
+        pdf_checks.check_snapshot(snapshot)
+    scan_cache.put(client, week_str, week_path, snapshot)
+    return client, week_path, snapshot
+
+
+def discover_week_matrix(clients, weeks, max_workers=SCAN_WORKERS, fresh=False, cancel=None, timeout=SCAN_DIR_TIMEOUT):
+    """Stream (client, week_str, week_path, snapshot, status) for every (client, week) pair as each finishes.
+
+    status is "ok", "missing", "error", "timeout" or "cancelled". Lookups run on daemon
+    threads, so a pair stuck on an unreachable share is reported as "timeout" and
+    abandoned (a replacement worker picks up the remaining pairs), and setting the
+    `cancel` event ends the stream without waiting for anything still in flight.
+    """
+    pairs = [(c, w) for w in weeks for c in clients]
+    if not pairs:
+        return
+    todo = queue.Queue()
+    for pair in pairs:
+        todo.put(pair)
+    results = queue.Queue()
+    started = {}
+    started_lock = threading.Lock()
+
+    def worker():
+        while not (cancel is not None and cancel.is_set()):
+            try:
+                pair = todo.get_nowait()
+            except queue.Empty:
+                return
+            with started_lock:
+                # The timeout clock runs only while the lookup is inside a share operation, so a
+                # lookup queued behind a busy scheduler (read-ahead, other lookups) is not timed out
+                thread_id = threading.get_ident()
+                started[pair] = (thread_id, io_scheduler.busy_time(thread_id))
+            try:
+                _, week_path, snapshot = discover_client(pair[0], pair[1], fresh)
+                status = "ok" if week_path else "missing"
             except Exception:
+                # Unreadable client share - report it rather than failing the scan
+                week_path, snapshot, status = None, None, "error"
+            results.put((pair, week_path, snapshot, status))
+
+    def spawn_worker():
+        threading.Thread(target=worker, daemon=True, name="scan").start()
+
+    for _ in range(max(1, min(max_workers, len(pairs)))):
+        spawn_worker()
+
+    reported = set()
+    while len(reported) < len(pairs):
+        if cancel is not None and cancel.is_set():
+            for pair in pairs:
+                if pair not in reported:
+                    yield pair[0], pair[1], None, None, "cancelled"
+            return
+        try:
+            pair, week_path, snapshot, status = results.get(timeout=0.2)
+            if pair not in reported:  # a late answer for a pair already reported as timed out is dropped
+                reported.add(pair)
+                yield pair[0], pair[1], week_path, snapshot, status
+        except queue.Empty:
+            pass
+        with started_lock:
+            overdue = [pair for pair, (thread_id, busy) in started.items()
+                       if pair not in reported and io_scheduler.busy_time(thread_id) - busy > timeout]
+        for pair in overdue:
+            reported.add(pair)
+            spawn_worker()  # the stuck worker is abandoned; keep the rest of the scan moving
+            yield pair[0], pair[1], None, None, "timeout"
+
+
+def discover_week_folders(clients, week_str, max_workers=SCAN_WORKERS, fresh=False, cancel=None):
+    """Stream (client, week_path, snapshot, status) for each client's week folder as its lookup finishes"""
+    for client, _, week_path, snapshot, status in discover_week_matrix(clients, [week_str], max_workers, fresh, cancel):
+        yield client, week_path, snapshot, status
+
+
+def _week_date(week_str, years):
+    """First of `years` in which the 'MM-DD' date exists (only 02-29 ever skips a year)"""
+    month, day = (int(part) for part in week_str.split("-"))
+    for year in years:
+        try:
+            return datetime(year, month, day)
+        except ValueError:
+            if (month, day) != (2, 29):
+                break
+    raise ValueError(f"{week_str} is not a valid MM-DD date" if (month, day) != (2, 29)
+                     else f"There is no 02-29 in {'/'.join(str(y) for y in years)}")
+
+
+def week_range(start_week, end_week, year=None):
+    """Week-ending dates from start_week to end_week inclusive ('MM-DD' strings, 7 days apart).
+
+    start_week is taken in `year` (the current year by default; 02-29 in the latest leap
+    year before it). An end that falls earlier in the year than the start is read as next
+    year only within BATCH_ROLLOVER_DAYS, so a catch-up batch from 12-26 through 01-09
+    crosses New Year while a mistyped 06-01 through 05-25 is refused instead of spanning 51 weeks.
+    """
+    year = year or datetime.now().year
+    start = _week_date(start_week, range(year, year - 8, -1))
+    end = _week_date(end_week, (start.year, start.year + 1))
+    if end < start:
+        end = _week_date(end_week, (start.year + 1,))
+        if (end - start).days > BATCH_ROLLOVER_DAYS:
+            raise ValueError(f"Batch end {end_week} is before the start {start_week}")
+    weeks = []
+    while start <= end:
+        weeks.append(start.strftime("%m-%d"))
+        start += timedelta(days=7)
+    return weeks
+
+
+def conversion_settings(kind):
+    """Everything besides the source bytes that shapes a conversion's output (part of the cache key)"""
+    if kind == "image":
+        page = "x".join(str(v) for v in IMAGE_PAGE_SIZE)
+        return (f"image:v4:jpeg-passthrough:q{IMAGE_JPEG_QUALITY}:page{page}"
+                f":dpi{IMAGE_TARGET_DPI}:gap{IMAGE_DOWNSAMPLE_THRESHOLD}"
+                + (f":mono{MONO_CHROMA_LEVEL}/{MONO_COLOR_FRACTION}/{MONO_INK_RATIO}/{MONO_MIDTONE_FRACTION}"
+                   if IMAGE_MONOCHROME and np is not None else ""))
+    if kind == "word":
+        return f"word:v2:{word_backend_name()}"
+    return f"{kind}:v1"
+
+
+class ConversionCache:
+    """Converted timesheet PDFs on local disk, keyed by source content hash + conversion settings.
+
+    A source whose size and mtime match what we hashed last time isn't read again.
+    Entries beyond the disk budget are evicted least-recently-used first. Cache
+    failures never fail a conversion - the file is just converted again.
+    """
+
+    def __init__(self, folder, budget_bytes):
+        self.folder = folder
+        self.budget_bytes = budget_bytes
+        os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(folder, "manifest.sqlite"), check_same_thread=False, timeout=30)
+        with self._lock, self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, size INTEGER, last_used REAL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, digest TEXT)")
+
+    def _entry_path(self, key):
+        return os.path.join(self.folder, f"{key}.pdf")
+
+    def source_digest(self, path, size, mtime, local_path):
+        try:
+            with self._lock:
+                row = self.conn.execute("SELECT size, mtime, digest FROM sources WHERE path = ?", (path,)).fetchone()
+            if row and row[0] == size and row[1] == mtime:
+                return row[2]
+            h = hashlib.sha256()
+            with open(local_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            with self._lock, self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", (path, size, mtime, digest))
+            return digest
+        except (OSError, sqlite3.Error):
+            return None
+
+    def get(self, key):
+        try:
+            with open(self._entry_path(key), "rb") as f:
+                data = f.read()
+            with self._lock, self.conn:
+                self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            return data
+        except (OSError, sqlite3.Error):
+            return None
+
+    def put(self, key, data):
+        entry = self._entry_path(key)
+        tmp = f"{entry}.{threading.get_ident()}.part"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, entry)
+            with self._lock, self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, len(data), time.time()))
+            self._evict()
+        except (OSError, sqlite3.Error):
+            try:
+                os.remove(tmp)
+            except OSError:
                 pass
-            writer.add_page(page)
-        with open(dst_pdf, "wb") as f:
-            writer.write(f)
-    except Exception:
-        # fallback: copy file
+
+    def _evict(self):
+        with self._lock, self.conn:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.budget_bytes:
+                return
+            for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+                try:
+                    os.remove(self._entry_path(key))
+                except OSError:
+                    pass
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                if total <= self.budget_bytes:
+                    break
+
+    def lookup(self, path, size, mtime, kind, src):
+        """(key, cached_bytes or None) for a raw timesheet whose local copy is src; key is None if it can't be hashed"""
+        digest = self.source_digest(path, size, mtime, src)
+        if digest is None:
+            return None, None
+        key = hashlib.sha256(f"{digest}|{conversion_settings(kind)}".encode("utf-8")).hexdigest()
+        return key, self.get(key)
+
+    def convert(self, path, size, mtime, kind, producer):
+        """(pdf_bytes, from_cache) for a raw timesheet; producer(local_path) only runs on a miss"""
+        src = local_copy(path, size, mtime)
+        key, data = self.lookup(path, size, mtime, kind, src)
+        if data is not None:
+            return data, True
+        data = producer(src)
+        if key is not None:
+            self.put(key, data)
+        return data, False
+
+
+conversion_cache = None  # opened by init_runtime()
+
+
+def convert_cached(path, size, mtime, kind, producer):
+    """Run producer on the local copy of a raw timesheet, going through the conversion cache when available"""
+    if conversion_cache is not None:
+        return conversion_cache.convert(path, size, mtime, kind, producer)
+    return producer(local_copy(path, size, mtime)), False
+
+
+def conversion_kind(ext):
+    if ext in (".jpg", ".jpeg", ".png"):
+        return "image"
+    if ext in (".docx", ".doc"):
+        return "word"
+    return None
+
+
+def convert_word_documents(jobs):
+    """{path: (pdf_bytes, from_cache) or Exception} for [(path, size, mtime)] Word timesheets.
+
+    Cache hits are served directly; every miss goes to the Word backend in a single batch,
+    run in an isolated worker. If the batch has to be killed, each document is retried
+    on its own so only the one that hangs is lost (and quarantined).
+    """
+    results = {}
+    misses = {}
+    for path, size, mtime in jobs:
         try:
-            from shutil import copyfile
-            copyfile(src_pdf, dst_pdf)
+            check_quarantine(path, size, mtime)
+            src = local_copy(path, size, mtime)
+            key, data = conversion_cache.lookup(path, size, mtime, "word", src) if conversion_cache is not None else (None, None)
+            if data is not None:
+                results[path] = (data, True)
+            else:
+                misses[src] = (path, key, size, mtime)
+        except Exception as e:
+            results[path] = e
+    if not misses:
+        return results
+    srcs = list(misses)
+    batch = submit_conversions([("word", srcs)])[0]()
+    if isinstance(batch, ConversionAborted) and len(srcs) > 1:
+        batch = {}
+        for src, get in zip(srcs, submit_conversions([("word", [src]) for src in srcs])):
+            outcome = get()
+            batch[src] = outcome[src] if isinstance(outcome, dict) else outcome
+    elif isinstance(batch, Exception):
+        batch = {src: batch for src in srcs}
+    for src, outcome in batch.items():
+        path, key, size, mtime = misses[src]
+        quarantine_if_aborted(path, size, mtime, src, outcome)
+        if not isinstance(outcome, Exception):
+            if key is not None:
+                conversion_cache.put(key, outcome)
+            outcome = (outcome, False)
+        results[path] = outcome
+    return results
+
+
+CONVERTERS = {
+    "image": image_page_bytes,
+    "word": word_to_pdf_bytes,
+}
+
+
+def pdf_rotation_plan(src_pdf):
+    geometry = probe_page_geometry(src_pdf)
+    if not geometry:
+        raise ValueError("the PDF has no pages")
+    plan = geometry_plan(geometry, timesheet_page_rotation)
+    return plan if any(plan) else None
+
+
+def _conversion_job(kind, src):
+    """Runs in a worker process: the CPU-bound part of preparing one timesheet"""
+    if kind == "pdf":
+        return pdf_rotation_plan(src)
+    if kind == "word":
+        return convert_word_batch(src)  # src: a batch of documents for one backend session
+    if kind == "merge":
+        return write_pdf_file(*src)  # src: (output path, PreparedDocs, output profile, engine name)
+    return CONVERTERS[kind](src)
+
+
+class ConversionAborted(Exception):
+    """A conversion whose worker had to be killed (over its time budget or memory cap) or died"""
+
+
+def _isolated_worker(conn, memory_cap):
+    """Worker process main loop: run (kind, src) jobs from the pipe until told to stop.
+
+    The memory cap covers the worker and the converter applications its job started.
+    """
+    global _converter_conn
+
+    def watchdog():
+        while True:
+            if memory_cap and process_memory() + converter_memory() > memory_cap:
+                for pid in list(_converter_pids):
+                    kill_process_tree(pid)
+                os._exit(MEMORY_CAP_EXIT)
+            time.sleep(0.25)
+
+    _converter_conn = conn
+    threading.Thread(target=watchdog, daemon=True).start()
+    conn.send(("ready", None))  # imported and running - from here on a death is the job's doing
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        try:
+            reply = ("ok", _conversion_job(*job))
+        except Exception as e:
+            reply = ("error", e)
+        finally:
+            del _converter_pids[:]  # finished with them; the supervisor forgets them on the reply
+        try:
+            conn.send(reply)
+        except Exception:
+            conn.send(("error", RuntimeError(str(reply[1]))))  # unpicklable exception
+
+
+class IsolatedWorker:
+    def __init__(self):
+        self.conn, child = multiprocessing.Pipe()
+        self.converters = []  # converter applications the current job started (see register_converter_process)
+        self.ready = False  # set once the process has started up and said so
+        self.process = multiprocessing.Process(
+            target=_isolated_worker, args=(child, CONVERT_MEMORY_MB * 1024 * 1024), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        """Stop the worker and any Word / soffice its job started - a hung one would be reused otherwise"""
+        try:
+            self.process.kill()
+            self.process.join(5)
         except Exception:
             pass
+        for pid in self.converters:
+            kill_process_tree(pid)
+        self.converters = []
+        self.conn.close()
+
+
+class ConversionSupervisor:
+    """Runs conversion jobs in separate worker processes, each file under a wall-clock budget.
+
+    A worker that overruns its budget, crosses the memory cap or dies is killed and
+    replaced, and its job is retried on a fresh worker up to CONVERT_RETRIES times
+    before it fails with ConversionAborted. A stuck file therefore costs at most its
+    budget per attempt, and the other files keep converting meanwhile. A job that
+    covers several files (a Word batch) calls report_conversion_progress() after each
+    one, which starts its budget over. Idle workers are kept between calls, so process
+    start-up is paid once per session.
+
+    Every submit() gets its own dispatcher thread, but they all draw on one budget of
+    `size` worker slots, so concurrent callers never run more than `size` processes.
+    A job's budget starts when its worker reports ready. If worker processes can't be
+    started on this machine - or die or hang before they are ready - `unavailable`
+    holds the reason and jobs run in this process instead, without the budget or the
+    cap; that is never held against the file (no retry spent, no quarantine).
+    """
+
+    def __init__(self, size, timeout, retries):
+        self.size = size
+        self.timeout = timeout
+        self.retries = retries
+        self.unavailable = None
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(size)
+
+    def _take(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.kill()
+        return IsolatedWorker()
+
+    def _give_back(self, worker):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+        try:
+            worker.conn.send(None)
+            worker.conn.close()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _death(worker):
+        if worker.process.exitcode == MEMORY_CAP_EXIT:
+            return f"exceeded the {CONVERT_MEMORY_MB} MB memory cap"
+        return f"worker process died (exit code {worker.process.exitcode})"
+
+    def submit(self, jobs, on_progress=None):
+        """One Future per (kind, src) job; on_progress(job index) is called for its progress reports"""
+        futures = [Future() for _ in jobs]
+        pending = deque((i, 0) for i in range(len(jobs)))
+        threading.Thread(target=self._dispatch, args=(jobs, futures, pending, on_progress), daemon=True).start()
+        return futures
+
+    def _dispatch(self, jobs, futures, pending, on_progress=None):
+        active = {}  # worker -> (job index, attempt, deadline)
+
+        def run_inline(i):
+            return _run_inline(jobs[i], (lambda: on_progress(i)) if on_progress else None)
+
+        while pending or active:
+            # Wait for a slot only when there's nothing of our own to watch meanwhile
+            while pending and self._slots.acquire(blocking=not active):
+                i, attempt = pending.popleft()
+                try:
+                    if self.unavailable is not None:
+                        raise self.unavailable
+                    worker = self._take()
+                except Exception as e:
+                    self._slots.release()
+                    self.unavailable = e
+                    futures[i].set_result(run_inline(i))
+                    continue
+                try:
+                    worker.conn.send(jobs[i])
+                except Exception as e:
+                    self._slots.release()
+                    worker.kill()
+                    futures[i].set_result(e)
+                    continue
+                # Until the worker is ready, the deadline only bounds its start-up
+                active[worker] = (i, attempt, time.monotonic() + self.timeout)
+            if not active:
+                continue
+            wait_for = max(0.0, min(deadline for _, _, deadline in active.values()) - time.monotonic())
+            if pending:
+                wait_for = min(wait_for, 0.5)  # look again for a slot another caller has freed
+            multiprocessing.connection.wait(
+                [w.conn for w in active] + [w.process.sentinel for w in active], timeout=wait_for)
+            now = time.monotonic()
+            for worker, (i, attempt, deadline) in list(active.items()):
+                failure = None
+                if worker.conn.poll():
+                    try:
+                        status, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join(1)
+                        failure = self._death(worker)
+                    else:
+                        if status in ("ready", "progress"):
+                            # Started, or another document of a batch done: the budget starts over
+                            worker.ready = True
+                            active[worker] = (i, attempt, time.monotonic() + self.timeout)
+                            if status == "progress" and on_progress:
+                                on_progress(i)
+                            continue
+                        if status == "converter":
+                            worker.converters.append(value)
+                            continue
+                        worker.converters = []
+                        del active[worker]
+                        self._give_back(worker)
+                        self._slots.release()
+                        futures[i].set_result(value)
+                        continue
+                elif not worker.process.is_alive():
+                    failure = self._death(worker)
+                elif now >= deadline:
+                    failure = (f"no progress for {self.timeout:.0f}s" if worker.ready
+                               else f"not ready after {self.timeout:.0f}s")
+                else:
+                    continue
+                del active[worker]
+                worker.kill()
+                self._slots.release()
+                if not worker.ready:
+                    # The process never got as far as the job: the machine's trouble, not the file's
+                    self.unavailable = RuntimeError(f"conversion worker failed to start: {failure}")
+                    futures[i].set_result(run_inline(i))
+                elif attempt < self.retries:
+                    pending.append((i, attempt + 1))
+                else:
+                    futures[i].set_result(ConversionAborted(f"{failure} ({attempt + 1} attempts)"))
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor():
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ConversionSupervisor(CONVERT_WORKERS, CONVERT_TIMEOUT, CONVERT_RETRIES)
+        return _supervisor
+
+
+def _run_inline(job, on_progress=None):
+    """A (kind, src) job in this process: its result, or the exception it raised"""
+    _inline_progress.callback = on_progress
+    try:
+        return _conversion_job(*job)
+    except Exception as e:
+        return e
+    finally:
+        _inline_progress.callback = None
+        del _converter_pids[:]
+
+
+def submit_conversions(jobs, on_progress=None):
+    """Start (kind, src) jobs in isolated worker processes; returns one result getter per job, in job order.
+
+    A getter returns the job's result or the exception it raised (ConversionAborted
+    when the worker had to be killed). on_progress(job index) is called whenever a job
+    reports progress. Once worker processes have failed to start, later jobs run inline
+    when collected.
+    """
+    supervisor = get_supervisor()
+    if supervisor.unavailable is not None:
+        return [lambda i=i, job=job: _run_inline(job, (lambda: on_progress(i)) if on_progress else None)
+                for i, job in enumerate(jobs)]
+    return [fut.result for fut in supervisor.submit(jobs, on_progress)]
+
+
+def run_isolated(kind, src, on_progress=None):
+    """A single conversion in an isolated worker; raises what the job raised. on_progress()
+    is called for each progress report of the job"""
+    outcome = submit_conversions([(kind, src)], (lambda i: on_progress()) if on_progress else None)[0]()
+    if isinstance(outcome, Exception):
+        raise outcome
+    return outcome
+
+
+class Quarantine:
+    """Raw timesheets whose conversion had to be killed, kept so later runs don't spend the budget again.
+
+    A copy of the file goes to the quarantine folder for inspection and the entry is
+    remembered by path, size and mtime; a changed file gets another try.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._index = os.path.join(folder, "quarantine.json")
+        try:
+            with open(self._index, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def reason(self, path, size, mtime):
+        """Why path was quarantined, or None if it wasn't (or has changed since)"""
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            return entry["reason"]
+        return None
+
+    def add(self, path, size, mtime, local, reason):
+        with self._lock:
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                copy = os.path.join(self.folder, f"{hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]}_{os.path.basename(path)}")
+                shutil.copyfile(local, copy)
+            except OSError:
+                copy = None
+            self._entries[path] = {"size": size, "mtime": mtime, "reason": reason, "copy": copy,
+                                   "when": datetime.now().isoformat(timespec="seconds")}
+            try:
+                with open(self._index, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, indent=1)
+            except OSError:
+                pass
 
 
-def image_to_pdf(image_path, out_pdf):
-    image = Image.open(image_path)
-    image = ImageOps.exif_transpose(image)
-    image.convert("RGB").save(out_pdf)
+quarantine = None  # loaded by init_runtime()
 
 
-def word_to_rotated_pdf(doc_path, out_pdf):
-    temp_pdf = out_pdf.replace(".pdf", "_raw.pdf")
-    convert(doc_path, temp_pdf)  # requires MS Word on Windows
-    rotate_pdf_if_needed(temp_pdf, out_pdf)
-    try:
-        os.remove(temp_pdf)
-    except Exception:
-        pass
+def check_quarantine(path, size, mtime):
+    """Raise ConversionAborted for a file quarantined by an earlier run"""
+    reason = quarantine.reason(path, size, mtime) if quarantine is not None else None
+    if reason is not None:
+        raise ConversionAborted(f"quarantined earlier ({reason}) - fix or replace the file to retry")
 
 
-def find_week_folder(client_root, week_str):
-    if not os.path.isdir(client_root):
-        return None
-    target = f"Week {week_str}"
-    for month_name in sorted(os.listdir(client_root)):
-        month_path = os.path.join(client_root, month_name)
-        if not os.path.isdir(month_path):
-            continue
-        week_path = os.path.join(month_path, target)
-        if os.path.isdir(week_path):
-            return week_path
-    return None
+def quarantine_if_aborted(path, size, mtime, local, outcome):
+    if isinstance(outcome, ConversionAborted) and quarantine is not None:
+        quarantine.add(path, size, mtime, local, str(outcome))
 
 
-def list_raw_files(folder):
-    files = []
-    if not os.path.isdir(folder):
-        return files
-    for name in sorted(os.listdir(folder)):
-        path = os.path.join(folder, name)
-        if not os.path.isfile(path):
-            continue
-        ext = os.path.splitext(name)[1].lower()
-        if ext in (".pdf", ".jpg", ".jpeg", ".png", ".docx", ".doc"):
-            files.append(path)
-    return files
+class WatchService:
+    """Polls the selected clients' week folders and pre-stages new timesheets as they arrive.
+
+    Images and Word files are converted into the conversion cache; PDFs are copied
+    to local disk by the read-ahead cache.
+
+    Plain polling rather than change notifications, so it behaves the same on the
+    O: share and on Linux. A file is converted once a stat of the file itself has
+    returned the same size/mtime on two polls in a row, so half-copied scans are left
+    alone. The folder listing isn't trusted for that: directory entries of a file still
+    being written can lag behind it, and copies often keep the source's old mtime.
+    """
+
+    def __init__(self, clients, week_str, on_event=None, interval=WATCH_INTERVAL):
+        self.clients = list(clients)
+        self.week_str = week_str
+        self.on_event = on_event
+        self.interval = interval
+        self._stop = threading.Event()
+        self._seen = {}
+        self._done = set()
+        self.thread = None
+
+    def start(self):
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive() and not self._stop.is_set()
+
+    def _emit(self, msg):
+        if self.on_event:
+            self.on_event(msg)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                self._emit(f"Watch poll failed: {e}")
+            self._stop.wait(self.interval)
+
+    def poll_once(self):
+        staged = 0
+        word_pending = {}  # converted together after the walk, in one Word session
+        for client in self.clients:
+            if self._stop.is_set():
+                break
+            week_path = find_week_folder(os.path.join(main_folder, client), self.week_str)
+            if not week_path:
+                continue
+            try:
+                snapshot = FolderSnapshot.capture(week_path)
+            except OSError:
+                continue
+            for name, path, size, mtime in snapshot.files():
+                if self._stop.is_set():
+                    break
+                # Same selection as prepare_files_for_merge: every non-invoice timesheet
+                ext = os.path.splitext(name)[1].lower()
+                if ext not in RAW_EXTENSIONS or "invoice" in name.lower():
+                    continue
+                if (path, size, mtime) in self._done:
+                    continue
+                try:
+                    st = share_io("stat", os.stat, path)
+                except OSError:
+                    self._seen.pop(path, None)
+                    continue
+                size, mtime = st.st_size, st.st_mtime
+                settled = self._seen.get(path) == (size, mtime)
+                self._seen[path] = (size, mtime)
+                if not settled or (path, size, mtime) in self._done:
+                    continue
+                kind = conversion_kind(ext)
+                if kind == "word":
+                    word_pending[(path, size, mtime)] = (client, name)
+                    continue
+                try:
+                    if kind:
+                        check_quarantine(path, size, mtime)
+                        try:
+                            _, hit = convert_cached(path, size, mtime, kind, lambda src: run_isolated(kind, src))
+                        except ConversionAborted as e:
+                            quarantine_if_aborted(path, size, mtime, local_copy(path, size, mtime), e)
+                            raise
+                    else:
+                        # PDFs need no conversion - just get the local copy in place for the merge
+                        local_copy(path, size, mtime)
+                        hit = False
+                    self._done.add((path, size, mtime))
+                    if not hit:
+                        staged += 1
+                        self._emit(f"Pre-staged {name} for {client}")
+                except Exception as e:
+                    if isinstance(e, ConversionAborted):
+                        self._done.add((path, size, mtime))  # quarantined - don't retry every poll
+                    self._emit(f"Could not pre-stage {name} for {client}: {e}")
+        if word_pending and not self._stop.is_set():
+            try:
+                results = convert_word_documents(list(word_pending))
+            except Exception as e:
+                results = {path: e for path, _, _ in word_pending}
+            for job, (client, name) in word_pending.items():
+                outcome = results[job[0]]
+                if isinstance(outcome, Exception):
+                    if isinstance(outcome, ConversionAborted):
+                        self._done.add(job)
+                    self._emit(f"Could not pre-stage {name} for {client}: {outcome}")
+                    continue
+                self._done.add(job)
+                if not outcome[1]:
+                    staged += 1
+                    self._emit(f"Pre-staged {name} for {client}")
+        return staged
 
 
 def backup_raw_files(raw_files, client_name, week_str, logger=None):
-    """Move raw files to backup location with week date folder structure"""
+    """Move raw files to backup location with week date folder structure.
+
+    raw_files come from the listing prepare_files_for_merge just validated, so the week
+    folder isn't listed again; a file removed since simply fails its own move.
+    """
     try:
         # Create backup directory structure: Backup/Week_MM-DD/Client_Name/
         week_backup_path = os.path.join(backup_folder, f"Week_{week_str}")
         client_backup_path = os.path.join(week_backup_path, client_name)
         
         os.makedirs(client_backup_path, exist_ok=True)
+
+        # One listing of the backup side instead of an exists() round trip per file
+        taken = set(share_io("list", os.listdir, client_backup_path))
         
-        moved_files = []
+        # Pick every destination name up front, then move in parallel under the share I/O scheduler
+        planned = []
         for file_path in raw_files:
-            if os.path.exists(file_path):
-                filename = os.path.basename(file_path)
-                backup_file_path = os.path.join(client_backup_path, filename)
-                
-                # Handle duplicate filenames by adding counter
-                counter = 1
-                original_backup_path = backup_file_path
-                while os.path.exists(backup_file_path):
-                    name, ext = os.path.splitext(original_backup_path)
-                    backup_file_path = f"{name}_{counter}{ext}"
-                    counter += 1
-                
-                try:
-                    shutil.move(file_path, backup_file_path)
-                    moved_files.append((file_path, backup_file_path))
-                    if logger:
-                        logger.log(f"Backed up: {filename} → {os.path.relpath(backup_file_path, backup_folder)}", "ok")
-                except Exception as e:
-                    if logger:
-                        logger.log(f"Failed to backup {filename}: {e}", "error")
+            filename = os.path.basename(file_path)
+            backup_name = filename
+            
+            # Handle duplicate filenames by adding counter
+            counter = 1
+            while backup_name in taken:
+                name, ext = os.path.splitext(filename)
+                backup_name = f"{name}_{counter}{ext}"
+                counter += 1
+            taken.add(backup_name)
+            planned.append((file_path, os.path.join(client_backup_path, backup_name)))
+
+        def move_one(job):
+            file_path, backup_file_path = job
+            filename = os.path.basename(file_path)
+            try:
+                share_io("move", shutil.move, file_path, backup_file_path)
+                if logger:
+                    logger.log(f"Backed up: {filename} → {os.path.relpath(backup_file_path, backup_folder)}", "ok")
+                return job
+            except FileNotFoundError:
+                if logger:
+                    logger.log(f"Not backed up: {filename} is no longer in the week folder", "warn")
+                return None
+            except Exception as e:
+                if logger:
+                    logger.log(f"Failed to backup {filename}: {e}", "error")
+                return None
+
+        moved_files = []
+        if planned:
+            with ThreadPoolExecutor(max_workers=min(len(planned), IO_MAX_CONCURRENCY)) as pool:
+                moved_files = [job for job in pool.map(move_one, planned) if job]
         
         if logger:
             logger.log(f"Successfully backed up {len(moved_files)} files for {client_name}", "ok")
@@ -233,69 +2925,195 @@ def backup_raw_files(raw_files, client_name, week_str, logger=None):
         return []
 
 
-def prepare_files_for_merge(folder, logger=None):
+def word_jobs_in(snapshot):
+    """(path, size, mtime) of the Word timesheets in a week folder listing (the invoice is never converted)"""
+    return [(path, size, mtime) for name, path, size, mtime in snapshot.files()
+            if os.path.splitext(name)[1].lower() in (".docx", ".doc") and "invoice" not in name.lower()]
+
+
+def prepare_files_for_merge(folder, logger=None, snapshot=None, word_results=None):
     invoice_candidate = None
     others = []
-    raw_files = []  # Track all original raw files for backup
-    
-    for name in sorted(os.listdir(folder)):
-        path = os.path.join(folder, name)
-        if not os.path.isfile(path):
-            continue
+    raw_files = []  # Original files that made it into the merge - only these are backed up
+
+    # Reuse the scan-time listing unless the folder changed since
+    if snapshot is None or snapshot.folder != folder:
+        snapshot = FolderSnapshot.capture(folder)
+        word_results = None
+    else:
+        current = snapshot.refreshed()
+        if current is not snapshot:
+            if logger:
+                logger.log(f"Folder changed since scan, relisting: {folder}", "warn")
+            snapshot = current
+            word_results = None  # converted from the old listing
+
+    file_stats = {}
+    for name, path, size, mtime in snapshot.files():
+        file_stats[path] = (size, mtime)
         lower = name.lower()
         ext = os.path.splitext(name)[1].lower()
         
-        # Track all raw files that will be processed
-        if ext in (".pdf", ".jpg", ".jpeg", ".png", ".docx", ".doc"):
-            raw_files.append(path)
-        
         if "invoice" in lower:
             invoice_candidate = path
             continue
-        if ext in (".pdf", ".jpg", ".jpeg", ".png", ".docx", ".doc"):
+        if ext in RAW_EXTENSIONS:
             others.append(path)
 
     prepared = []
-    invoice_final = None
+    invoice_doc = None
 
     if invoice_candidate:
-        # Use the original invoice file directly, don't create duplicates
-        invoice_final = invoice_candidate
+        # Use the original invoice file directly, don't create duplicates - read from
+        # the read-ahead copy of exactly the version listed above
+        invoice_doc = PreparedDoc(invoice_candidate, local_copy(invoice_candidate, *file_stats[invoice_candidate]))
+        if os.path.splitext(invoice_candidate)[1].lower() in RAW_EXTENSIONS:
+            raw_files.append(invoice_candidate)
         if logger:
-            logger.log(f"Using original invoice: {os.path.basename(invoice_final)}", "ok")
-
-    for p in others:
-        root = os.path.splitext(os.path.basename(p))[0]
+            logger.log(f"Using original invoice: {os.path.basename(invoice_candidate)}", "ok")
+            if invoice_candidate.lower().endswith(".pdf"):
+                check = pdf_checks.check(invoice_candidate, *file_stats[invoice_candidate], local_path=invoice_doc.pdf)
+                if not check.usable:
+                    logger.log(f"Invoice failed the pre-flight check ({check.describe()}) - the merge may fail", "warn")
+
+    # Images and PDF orientation checks are CPU-bound and go to the isolated workers;
+    # Word conversions drive the Word backend, so they run here (as one batch) while the pool works.
+    # word_results holds documents the run already converted up front.
+    # Results are collected in folder order, so the merged page order never depends on timing.
+    slots = [None] * len(others)
+    pending = []
+    word_jobs = []
+    for i, p in enumerate(others):
         ext = os.path.splitext(p)[1].lower()
+        size, mtime = file_stats[p]
         try:
+            # Work from the read-ahead copy on local disk rather than the share;
+            # results stay in memory and go straight to the merge writer
+            check_quarantine(p, size, mtime)
+            src = local_copy(p, size, mtime)
             if ext == ".pdf":
-                out_pdf = os.path.join(folder, f"{root}_rotated.pdf")
-                # Use enhanced timesheet orientation for better alignment
-                optimize_timesheet_orientation(p, out_pdf)
-                prepared.append(out_pdf)
-                if logger:
-                    logger.log(f"Prepared PDF with optimized orientation: {os.path.basename(p)}", "ok")
+                # Usually already checked during the scan; bad files are never handed to a parser
+                check = pdf_checks.check(p, size, mtime, local_path=src)
+                if not check.usable:
+                    raise ValueError(f"failed the pre-flight check ({check.describe()})")
+                if check.status == "suspect" and logger:
+                    logger.log(f"{os.path.basename(p)}: {check.describe()}", "warn")
+                pending.append((i, p, "pdf", src, None))
             elif ext in (".jpg", ".jpeg", ".png"):
-                out_pdf = os.path.join(folder, f"{root}.pdf")
-                image_to_pdf(p, out_pdf)
-                prepared.append(out_pdf)
-                if logger:
-                    logger.log(f"Prepared Image: {os.path.basename(p)}", "ok")
+                # Unchanged images (same content + settings) come straight from the conversion cache
+                key, data = conversion_cache.lookup(p, size, mtime, "image", src) if conversion_cache is not None else (None, None)
+                page = None
+                if data is not None:
+                    try:
+                        page = ImagePage.from_bytes(data)
+                    except ValueError:
+                        pass  # unreadable cache entry - convert again
+                if page is not None:
+                    slots[i] = (page, "Prepared Image (cached)")
+                else:
+                    pending.append((i, p, "image", src, key))
             elif ext in (".docx", ".doc"):
-                out_pdf = os.path.join(folder, f"{root}.pdf")
-                word_to_rotated_pdf(p, out_pdf)
-                prepared.append(out_pdf)
-                if logger:
-                    logger.log(f"Prepared Word: {os.path.basename(p)}", "ok")
+                word_jobs.append((i, p, size, mtime))
+        except Exception as e:
+            slots[i] = (None, e)
+
+    results = submit_conversions([(kind, src) for _, _, kind, src, _ in pending])
+
+    word_results = dict(word_results or {})
+    todo = [(p, size, mtime) for _, p, size, mtime in word_jobs if p not in word_results]
+    if todo:
+        word_results.update(convert_word_documents(todo))
+    for i, p, size, mtime in word_jobs:
+        outcome = word_results[p]
+        if isinstance(outcome, Exception):
+            slots[i] = (None, outcome)
+            continue
+        data, hit = outcome
+        try:
+            # Rotation is applied to the pages in memory - no raw/rotated temp files
+            slots[i] = (prepare_pdf(data, source=p, rule=word_page_rotation), f"Prepared Word{' (cached)' if hit else ''}")
         except Exception as e:
+            slots[i] = (None, e)
+
+    for (i, p, kind, src, key), get_result in zip(pending, results):
+        outcome = get_result()
+        quarantine_if_aborted(p, *file_stats[p], src, outcome)
+        if isinstance(outcome, Exception):
+            slots[i] = (None, outcome)
+        elif kind == "pdf":
+            # Use enhanced timesheet orientation for better alignment
+            # The probe only read the page tree; pages that need no turning go to the merge as they are
+            note = "Prepared PDF with optimized orientation" if outcome else "Prepared PDF (orientation already fine)"
+            slots[i] = (PreparedDoc(p, src, outcome), note)
+        else:
+            if key is not None:
+                conversion_cache.put(key, outcome)
+            slots[i] = (ImagePage.from_bytes(outcome), "Prepared Image")
+
+    # Consecutive images become one multi-page PDF built in a single pass, so the merge
+    # parses one document per run of images instead of one per image; order is unchanged
+    image_in = image_out = 0
+    image_run = []
+
+    def flush_images():
+        if image_run:
+            pages = [page for _, page in image_run]
+            prepared.append(PreparedDoc(image_run[0][0], build_image_pdf(pages)))
+            image_run.clear()
+
+    for p, slot in zip(others, slots):
+        if slot is None:
+            continue
+        doc, note = slot
+        if doc is None:
             if logger:
-                logger.log(f"Error preparing {os.path.basename(p)}: {e}", "error")
+                logger.log(f"Error preparing {os.path.basename(p)}: {note} - left in the week folder, not merged", "error")
             continue
+        raw_files.append(p)
+        if isinstance(doc, ImagePage):
+            image_run.append((p, doc))
+            image_in += file_stats[p][0]
+            image_out += len(doc.data)
+        else:
+            flush_images()
+            prepared.append(doc)
+        if logger:
+            logger.log(f"{note}: {os.path.basename(p)}", "ok")
+    flush_images()
+    if image_in and logger:
+        logger.log(f"Images: {image_in / 1048576:.1f} MB raw -> {image_out / 1048576:.1f} MB in the merge "
+                   f"(saved {(image_in - image_out) / 1048576:.1f} MB)", "info")
 
     final_list = []
     # Don't include invoice in final_list since we handle it separately during merge
     final_list.extend(prepared)
-    return final_list, invoice_final, raw_files
+    return final_list, invoice_doc, raw_files
+
+
+def init_runtime():
+    """Create the working folders and open the indexes and caches - once, from the app.
+
+    Nothing here runs at import: conversion workers are started with spawn on Windows,
+    which re-imports this file in every worker, and they must not create folders on the
+    share, open the SQLite indexes or start read-ahead threads of their own.
+    """
+    global dir_index, recent_index, read_ahead, conversion_cache, quarantine
+    os.makedirs(log_folder, exist_ok=True)
+    os.makedirs(backup_folder, exist_ok=True)
+    os.makedirs(local_cache_root, exist_ok=True)
+    dir_index = _open_index(DirectoryIndex)
+    recent_index = _open_index(RecentMergesIndex)
+    try:
+        read_ahead = ReadAheadCache(readahead_folder)
+    except Exception as e:
+        print(f"Read-ahead cache unavailable: {e}")
+        read_ahead = None
+    try:
+        conversion_cache = ConversionCache(conversion_cache_folder, CONVERSION_CACHE_MB * 1024 * 1024)
+    except Exception as e:
+        print(f"Conversion cache unavailable: {e}")
+        conversion_cache = None
+    quarantine = Quarantine(quarantine_folder)
 
 
 # ============ APPLICATION ============
@@ -381,13 +3199,27 @@ class App(tb.Window):
 
         tk.Label(week_panel, text="(will search for folders named 'Week MM-DD')", bg=PANEL_BG, fg=TEXT_FG).pack(anchor="w", pady=(6,0))
 
+        thru_row = tk.Frame(week_panel, bg=PANEL_BG)
+        thru_row.pack(anchor="w", pady=(10,2))
+        tk.Label(thru_row, text="Batch through (MM-DD):", bg=PANEL_BG, fg=TEXT_FG).pack(side="left")
+        self.through_var = tk.StringVar()
+        self.through_entry = tb.Entry(thru_row, textvariable=self.through_var, width=8)
+        self.through_entry.pack(side="left", padx=(6, 12))
+        tk.Label(week_panel, text="(Batch Merge runs every week from MM-DD through this date)", bg=PANEL_BG, fg=TEXT_FG).pack(anchor="w")
+
         actions_panel = tb.Frame(top_container, bootstyle="light", padding=8)
         actions_panel.grid(row=1, column=2, sticky="nsew", padx=(8, 4))
         top_container.grid_columnconfigure(2, weight=0)
 
         self.start_btn = tb.Button(actions_panel, text="Start Merging", width=18, bootstyle="success", command=self.on_start)
         self.start_btn.pack(pady=(2,8))
+        self.batch_btn = tb.Button(actions_panel, text="Batch Merge", width=18, bootstyle="success-outline", command=self.on_batch_start)
+        self.batch_btn.pack(pady=(0,8))
         tb.Button(actions_panel, text="Refresh Scan", width=18, bootstyle="info-outline", command=self.refresh_scan).pack(pady=(0,8))
+        self.cancel_btn = tb.Button(actions_panel, text="Cancel Scan", width=18, bootstyle="warning-outline", command=self.cancel_scan, state="disabled")
+        self.cancel_btn.pack(pady=(0,8))
+        self.watch_btn = tb.Button(actions_panel, text="Start Watch Mode", width=18, bootstyle="secondary-outline", command=self.toggle_watch)
+        self.watch_btn.pack(pady=(0,8))
         tb.Button(actions_panel, text="Exit", width=18, bootstyle="danger", command=self.destroy).pack()
 
         # Middle area
@@ -425,6 +3257,10 @@ class App(tb.Window):
         tk.Label(stats_grid, text="Errors:", bg=PANEL_BG, fg=TEXT_FG).grid(row=3, column=0, sticky="w", padx=4, pady=2)
         tk.Label(stats_grid, textvariable=self.status_vars["errors"], bg=PANEL_BG, fg=TEXT_FG).grid(row=3, column=1, sticky="w", padx=8, pady=2)
 
+        tk.Label(stats_frame, text="Recent Merges", bg=PANEL_BG, fg=TEXT_FG, font=("Segoe UI", 11, "bold")).pack(anchor="w", pady=(10, 0))
+        self.recent_list = tk.Listbox(stats_frame, height=8, bg="white", fg=TEXT_FG, relief="flat")
+        self.recent_list.pack(fill="both", expand=True, pady=(6, 0))
+
         right_mid = tk.Frame(middle, bg=PANEL_BG)
         right_mid.pack(side="right", fill="both", expand=True, padx=(8,0))
 
@@ -477,11 +3313,45 @@ class App(tb.Window):
         self.tasks_done = 0
         self._start_time = None
         self._lock = threading.Lock()
+        self.watcher = None
+        self.scan_cancel = None
+
+        # Show the indexed recent merges right away, then reconcile with the share in the background
+        self.populate_recent_merges()
+        threading.Thread(target=self._reconcile_recent_merges, daemon=True).start()
+
+    def populate_recent_merges(self):
+        """Fill the Recent Merges list from the index (no share access; call on the main thread)"""
+        try:
+            recent = recent_index.top(10) if recent_index is not None else []
+        except sqlite3.Error:
+            recent = []
+        self.recent_list.delete(0, "end")
+        for path, _ in recent:
+            self.recent_list.insert("end", os.path.basename(path))
+
+    def _reconcile_recent_merges(self):
+        if recent_index is None:
+            return
+        try:
+            recent_index.reconcile()
+        except Exception as e:
+            print(f"Recent merges reconciliation failed: {e}")
+            return
+        self.after(0, self.populate_recent_merges)
 
     def background_quick_scan(self):
-        threading.Thread(target=self._quick_scan_thread, daemon=True).start()
+        self.scan_cancel = threading.Event()
+        self.cancel_btn.configure(state="normal")
+        threading.Thread(target=self._quick_scan_thread, args=(self.scan_cancel,), daemon=True).start()
+
+    def cancel_scan(self):
+        """Stop the running scan; lookups stuck on the share are abandoned, not waited for"""
+        if self.scan_cancel is not None:
+            self.scan_cancel.set()
+            self._add_activity_line("Cancelling scan...")
 
-    def _quick_scan_thread(self):
+    def _quick_scan_thread(self, cancel):
         selected = [name for name, v in self.chk_vars if v.get()]
         
         # Add custom client if entered and checked
@@ -494,34 +3364,61 @@ class App(tb.Window):
         total_tasks = 0
         total_files = 0
         missing_folders = []
+        timed_out = []
         
         # Update progress during scan
-        scan_progress = 0
         total_clients = len(selected)
-        
-        for i, c in enumerate(selected):
+
+        # Refresh Scan always revalidates against the share; Start may reuse a scan from the last few seconds
+        fresh = not getattr(self, "_auto_start_merge", False)
+
+        # Clients are resolved in parallel; results arrive in completion order
+        for done, (c, week_path, snapshot, status) in enumerate(discover_week_folders(selected, week_str, fresh=fresh, cancel=cancel), start=1):
+            if status == "cancelled":
+                continue
             # Update scan progress
-            scan_progress = int((i / total_clients) * 100)
+            scan_progress = int((done / max(1, total_clients)) * 100)
             self.after(0, lambda p=scan_progress: self._update_progress_bar(p))
             self.after(0, lambda p=scan_progress: self.eta_label.configure(text=f"Scanning: {p}%"))
-            
-            client_root = os.path.join(main_folder, c)
-            week_path = find_week_folder(client_root, week_str)
-            if not week_path:
+
+            if status == "timeout":
+                pre_scan[c] = {"week": None, "files": [], "tasks": 1, "status": status}
+                total_tasks += 1
+                timed_out.append(c)
+                self.after(0, lambda client=c: self._add_activity_line(f"⏱️  {client}: share did not answer within {SCAN_DIR_TIMEOUT}s - skipped"))
+            elif not week_path:
                 pre_scan[c] = {"week": None, "files": [], "tasks": 1}
                 total_tasks += 1
                 missing_folders.append(c)
                 self.after(0, lambda client=c: self._add_activity_line(f"⚠️  No folder found for {client} (Week {week_str})"))
             else:
-                files = list_raw_files(week_path)
+                files = snapshot.raw_files()
                 # Updated task counting: 1 for finding week + 1 for file prep + 1 for merge + 1 for Excel update + 1 for backup
                 tasks = 5
-                pre_scan[c] = {"week": week_path, "files": files, "tasks": tasks}
+                pre_scan[c] = {"week": week_path, "files": files, "snapshot": snapshot, "tasks": tasks}
                 total_files += len(files)
                 total_tasks += tasks
                 self.after(0, lambda client=c, file_count=len(files): self._add_activity_line(f"✓ Found {file_count} files for {client}"))
+                for name, check in pdf_checks.check_snapshot(snapshot):
+                    icon = "⚠️ " if check.usable else "❌"
+                    self.after(0, lambda client=c, name=name, check=check, icon=icon: self._add_activity_line(
+                        f"{icon} {client}: {name} - {check.describe()}"))
+
+        # Keep the merge order matching the client selection, not scan completion
+        pre_scan = {c: pre_scan[c] for c in selected if c in pre_scan}
+        missing_folders = [c for c in selected if c in missing_folders]
+        cancelled = cancel.is_set()
 
         def ui_update():
+            self.cancel_btn.configure(state="disabled")
+            if cancelled:
+                self.pre_scan_info = {}
+                self.total_tasks = 0
+                self._add_activity_line(f"Scan cancelled ({len(pre_scan)} of {len(selected)} clients checked).")
+                self._update_progress_bar(0)
+                self.eta_label.configure(text="Scan cancelled")
+                self.start_btn.configure(state="normal")
+                return
             self.pre_scan_info = pre_scan
             self.total_tasks = total_tasks
             self.status_vars["processed"].set("0")
@@ -533,6 +3430,8 @@ class App(tb.Window):
             summary = f"Scan complete: {len(selected)} clients, {total_files} files, est. {total_tasks} tasks"
             if missing_folders:
                 summary += f"\n⚠️  Missing folders for: {', '.join(missing_folders)}"
+            if timed_out:
+                summary += f"\n⏱️  Timed out: {', '.join(timed_out)}"
             
             self._add_activity_line(summary)
             self._update_progress_bar(0)
@@ -648,7 +3547,109 @@ class App(tb.Window):
         self._auto_start_merge = False  # Don't auto-start for refresh scan
         self.background_quick_scan()
 
-    def _merge_thread(self, pre_scan_items, week_str):
+    def toggle_watch(self):
+        """Start/stop pre-staging conversions for the selected clients and week"""
+        if self.watcher is not None and self.watcher.is_running():
+            self.watcher.stop()
+            self.watcher = None
+            self.watch_btn.configure(text="Start Watch Mode", bootstyle="secondary-outline")
+            self._add_activity_line("Watch mode stopped.")
+            return
+
+        if conversion_cache is None:
+            messagebox.showwarning("Watch mode", f"Conversion cache folder is not available:\n{conversion_cache_folder}")
+            return
+        selected_clients = [name for name, v in self.chk_vars if v.get()]
+        custom_client = self.custom_client_var.get().strip()
+        if custom_client and self.custom_client_var_check.get():
+            selected_clients.append(custom_client)
+        if not selected_clients:
+            messagebox.showwarning("Select clients", "Please select at least one client.")
+            return
+        mm = self.month_var.get().strip()
+        dd = self.day_var.get().strip()
+        if not (mm.isdigit() and dd.isdigit() and 1 <= int(mm) <= 12 and 1 <= int(dd) <= 31):
+            messagebox.showwarning("Invalid date", "Please enter valid numeric Month (MM) and Day (DD).")
+            return
+        week_str = f"{mm.zfill(2)}-{dd.zfill(2)}"
+
+        self.watcher = WatchService(selected_clients, week_str, on_event=self._add_activity_line)
+        self.watcher.start()
+        self.watch_btn.configure(text="Stop Watch Mode", bootstyle="warning")
+        self._add_activity_line(f"Watch mode on: pre-staging Week {week_str} for {len(selected_clients)} clients every {WATCH_INTERVAL}s")
+
+    def on_batch_start(self):
+        """Merge every selected client for each week from Month/Day through the batch end date"""
+        selected_clients = [name for name, v in self.chk_vars if v.get()]
+        custom_client = self.custom_client_var.get().strip()
+        if custom_client and self.custom_client_var_check.get():
+            selected_clients.append(custom_client)
+        if not selected_clients:
+            messagebox.showwarning("Select clients", "Please select at least one client.")
+            return
+        mm = self.month_var.get().strip()
+        dd = self.day_var.get().strip()
+        if not (mm.isdigit() and dd.isdigit() and 1 <= int(mm) <= 12 and 1 <= int(dd) <= 31):
+            messagebox.showwarning("Invalid date", "Please enter valid numeric Month (MM) and Day (DD).")
+            return
+        start_week = f"{mm.zfill(2)}-{dd.zfill(2)}"
+        through = self.through_var.get().strip() or start_week
+        try:
+            end_mm, end_dd = through.split("-")
+            weeks = week_range(start_week, f"{end_mm.zfill(2)}-{end_dd.zfill(2)}")
+        except ValueError as e:
+            messagebox.showwarning("Invalid batch range", f"Please enter the batch end as MM-DD on or after the start (it may fall early next year).\n\n{e}")
+            return
+        if not messagebox.askyesno(
+            "Start batch",
+            f"Merge {len(selected_clients)} clients × {len(weeks)} weeks ({weeks[0]} → {weeks[-1]}) - "
+            f"{len(selected_clients) * len(weeks)} client weeks?"
+        ):
+            return
+
+        self.logger = StepLogger(self.log_text, f"{weeks[0]}_to_{weeks[-1]}")
+        self.activity_text.configure(state="normal")
+        self.activity_text.delete(1.0, tk.END)
+        self.activity_text.configure(state="disabled")
+        self._add_activity_line(f"Batch: {len(selected_clients)} clients × {len(weeks)} weeks ({weeks[0]} → {weeks[-1]})")
+
+        self.tasks_done = 0
+        self.total_tasks = 0
+        self._start_time = time.time()
+        self._safe_set_status(processed=0, merged=0, warnings=0, errors=0)
+        self._update_progress_bar(0)
+        self.eta_label.configure(text="Scanning batch...")
+        self.start_btn.configure(state="disabled")
+        self.batch_btn.configure(state="disabled")
+        self.scan_cancel = threading.Event()
+        self.cancel_btn.configure(state="normal")
+        threading.Thread(target=self._batch_merge_thread, args=(selected_clients, weeks), daemon=True).start()
+
+    def _batch_merge_thread(self, clients, weeks):
+        """One discovery pass over the whole client × week matrix, then every merge against one open workbook"""
+        matrix = {}
+        total_tasks = 0
+        cancel = self.scan_cancel
+        for client, week_str, week_path, snapshot, status in discover_week_matrix(clients, weeks, cancel=cancel):
+            if week_path:
+                matrix[(client, week_str)] = {"week": week_path, "files": snapshot.raw_files(), "snapshot": snapshot, "tasks": 5, "status": status}
+                total_tasks += 5
+            else:
+                matrix[(client, week_str)] = {"week": None, "files": [], "tasks": 1, "status": status}
+                total_tasks += 1
+        self.after(0, lambda: self.cancel_btn.configure(state="disabled"))
+        if cancel.is_set():
+            self.logger.log("Batch cancelled during scan - nothing was merged.", "warn")
+            self._add_activity_line("Batch cancelled.")
+            self.after(0, lambda: self.eta_label.configure(text="Batch cancelled"))
+            self.after(0, lambda: self.start_btn.configure(state="normal"))
+            self.after(0, lambda: self.batch_btn.configure(state="normal"))
+            return
+        found = sum(1 for info in matrix.values() if info["week"])
+        self._add_activity_line(f"Batch scan complete: {found} of {len(matrix)} week folders found")
+        with self._lock:
+            self.total_tasks = total_tasks
+
         try:
             wb = openpyxl.load_workbook(excel_file)
             ws = wb.active
@@ -658,184 +3659,74 @@ class App(tb.Window):
             self._finish(False)
             return
 
-        processed_clients = 0
-        merged_count = 0
-        warnings = 0
-        errors = 0
+        stats = {"processed": 0, "merged": 0, "warnings": 0, "errors": 0}
         missing_folders = []
-
-        for client, info in pre_scan_items:
-            try:
-                self.logger.log(f"--- Processing client: {client} ---")
-                self._add_activity_line(f"Processing: {client}")
-                
-                client_root = os.path.join(main_folder, client)
-                if not os.path.isdir(client_root):
-                    self.logger.log(f"Client folder not found: {client_root}", "error")
-                    self._add_activity_line(f"❌ Client folder missing: {client}")
-                    errors += 1
-                    missing_folders.append(f"{client} (main folder)")
-                    self._increment_task_and_update()
-                    continue
-
-                week_path = info.get("week")
-                if not week_path:
-                    week_path = find_week_folder(client_root, week_str)
-                if not week_path:
-                    self.logger.log(f"Week folder not found for {client} (week {week_str}).", "warn")
-                    self._add_activity_line(f"⚠️  Week folder missing: {client} (Week {week_str})")
-                    warnings += 1
+        io_scheduler.reset_stats()
+        memory = PeakMemoryMonitor().start()
+        self._convert_word_upfront(list(matrix.values()))
+        # Chronological, so Excel column G ends up with each client's latest week - same as running the weeks one by one
+        for week_str in weeks:
+            self.logger.log(f"=== Week {week_str} ===")
+            for client in clients:
+                info = matrix[(client, week_str)]
+                if info["week"] is None:
+                    if info["status"] == "timeout":
+                        self.logger.log(f"Share did not answer for {client} (week {week_str}) - skipped.", "warn")
+                    else:
+                        self.logger.log(f"Week folder not found for {client} (week {week_str}).", "warn")
+                    stats["warnings"] += 1
                     missing_folders.append(f"{client} (Week {week_str})")
                     self._increment_task_and_update()
                     continue
-                self.logger.log(f"Found week folder: {week_path}", "ok")
-                self._increment_task_and_update()
-
-                # File preparation with progress updates
-                self._add_activity_line(f"Preparing files for {client}...")
-                prepared_list, invoice_final, raw_files = prepare_files_for_merge(week_path, logger=self.logger)
-                self._increment_task_and_update()
+                self._process_client(ws, client, info, week_str, stats, missing_folders)
 
-                out_path = ""
-                if prepared_list and invoice_final:
-                    try:
-                        self._add_activity_line(f"Creating merged file with invoice and {len(prepared_list)} timesheets for {client}...")
-                        
-                        # Create new merged file with invoice first, then timesheets
-                        merger = PdfMerger()
-                        
-                        # Add invoice first
-                        merger.append(invoice_final)
-                        
-                        # Add all timesheets chronologically
-                        for i, p in enumerate(prepared_list):
-                            merger.append(p)
-                            # Update progress during merge
-                            merge_progress = int((i + 1) / len(prepared_list) * 50)
-                            self._update_progress_without_increment(merge_progress)
-                        
-                        # Generate output filename with invoice name + underscore
-                        original_invoice_name = os.path.splitext(os.path.basename(invoice_final))[0]
-                        out_name = f"{original_invoice_name}_.pdf"
-                        out_path = os.path.join(week_path, out_name)
-                        merger.write(out_path)
-                        merger.close()
-                        
-                        self.logger.log(f"New merged PDF created: {out_path}", "ok")
-                        merged_count += 1
-                        self._add_activity_line(f"✓ Created merged file for {client}: {os.path.basename(out_path)}")
-                        
-                    except Exception as e:
-                        self.logger.log(f"Merge failed for {client}: {e}", "error")
-                        self._add_activity_line(f"❌ Merge failed for {client}")
-                        errors += 1
-                    finally:
-                        self._increment_task_and_update()
-                elif prepared_list and not invoice_final:
-                    # Only timesheets, no invoice - create a new file
-                    try:
-                        self._add_activity_line(f"Creating timesheet compilation for {client}...")
-                        merger = PdfMerger()
-                        
-                        # Add all timesheets
-                        for i, p in enumerate(prepared_list):
-                            merger.append(p)
-                            # Update progress during merge
-                            merge_progress = int((i + 1) / len(prepared_list) * 50)
-                            self._update_progress_without_increment(merge_progress)
-                        
-                        # Generate output filename
-                        out_name = f"{client}_Week_{week_str}.pdf"
-                        out_path = os.path.join(week_path, out_name)
-                        merger.write(out_path)
-                        merger.close()
-                        
-                        self.logger.log(f"Timesheet compilation created: {out_path}", "ok")
-                        merged_count += 1
-                        self._add_activity_line(f"✓ Timesheet compilation for {client}: {os.path.basename(out_path)}")
-                    except Exception as e:
-                        self.logger.log(f"Timesheet compilation failed for {client}: {e}", "error")
-                        self._add_activity_line(f"❌ Timesheet compilation failed for {client}")
-                        errors += 1
-                    finally:
-                        self._increment_task_and_update()
-                else:
-                    self.logger.log(f"No files to process for {client}.", "warn")
-                    self._add_activity_line(f"⚠️  No files to process for {client}")
-                    warnings += 1
-                    self._increment_task_and_update()
+        try:
+            wb.save(excel_file)
+            self.logger.log("Excel saved.", "ok")
+        except Exception as e:
+            self.logger.log(f"Excel save error: {e}", "error")
+        self.logger.log(io_scheduler.report())
+        if _supervisor is not None and _supervisor.unavailable is not None:
+            self.logger.log(f"Conversions ran in this process, without isolation: {_supervisor.unavailable}", "warn")
+        memory.stop()
+        self.logger.log(memory.report())
 
-                try:
-                    # Improved Excel lookup with better client name matching
-                    self._add_activity_line(f"Updating Excel for {client}...")
-                    updated = False
-                    client_found = False
-                    for r in range(4, ws.max_row + 1):
-                        cell_val = ws.cell(row=r, column=2).value
-                        if cell_val:
-                            # Normalize both strings for comparison
-                            excel_client = str(cell_val).strip()
-                            target_client = client.strip()
-                            
-                            # Try exact match first
-                            if excel_client == target_client:
-                                ws.cell(row=r, column=7).value = out_path if prepared_list else ""
-                                updated = True
-                                client_found = True
-                                self.logger.log(f"Excel updated for {client} (exact match).", "ok")
-                                self._add_activity_line(f"✓ Excel updated for {client}")
-                                break
-                            # Try case-insensitive match
-                            elif excel_client.lower() == target_client.lower():
-                                ws.cell(row=r, column=7).value = out_path if prepared_list else ""
-                                updated = True
-                                client_found = True
-                                self.logger.log(f"Excel updated for {client} (case-insensitive match).", "ok")
-                                self._add_activity_line(f"✓ Excel updated for {client}")
-                                break
-                    
-                    if not client_found:
-                        self.logger.log(f"Client '{client}' not found in Excel Col B (rows 4..{ws.max_row}).", "warn")
-                        self._add_activity_line(f"⚠️  Client '{client}' not found in Excel")
-                        warnings += 1
-                        
-                except Exception as e:
-                    self.logger.log(f"Excel update failed for {client}: {e}", "error")
-                    self._add_activity_line(f"❌ Excel update failed for {client}")
-                    errors += 1
-                finally:
-                    self._increment_task_and_update()
+        if missing_folders:
+            self.logger.log("⚠️  Missing folders summary:", "warn")
+            for folder in missing_folders:
+                self.logger.log(f"   - {folder}", "warn")
+            self._add_activity_line(f"⚠️  {len(missing_folders)} missing folders detected")
+        self._finish(True, missing_folders)
 
-                # NEW: Backup raw files after successful processing
-                try:
-                    if raw_files:  # Only backup if we have raw files
-                        self._add_activity_line(f"Backing up raw files for {client}...")
-                        backup_raw_files(raw_files, client, week_str, logger=self.logger)
-                        self._add_activity_line(f"✓ Backup complete for {client}")
-                    else:
-                        self.logger.log(f"No raw files to backup for {client}.", "warn")
-                        
-                except Exception as e:
-                    self.logger.log(f"Backup failed for {client}: {e}", "error")
-                    self._add_activity_line(f"❌ Backup failed for {client}")
-                    errors += 1
-                finally:
-                    self._increment_task_and_update()
+    def _merge_thread(self, pre_scan_items, week_str):
+        try:
+            wb = openpyxl.load_workbook(excel_file)
+            ws = wb.active
+            self.logger.log(f"Opened Excel: {excel_file}", "ok")
+        except Exception as e:
+            self.logger.log(f"Cannot open Excel: {e}", "error")
+            self._finish(False)
+            return
 
-                processed_clients += 1
-                self._safe_set_status(processed=processed_clients, merged=merged_count, warnings=warnings, errors=errors)
+        stats = {"processed": 0, "merged": 0, "warnings": 0, "errors": 0}
+        missing_folders = []
+        io_scheduler.reset_stats()
+        memory = PeakMemoryMonitor().start()
+        self._convert_word_upfront([info for _, info in pre_scan_items])
 
-            except Exception as e:
-                self.logger.log(f"Unexpected failure for {client}: {e}", "error")
-                errors += 1
-                self._increment_task_and_update()
-                continue
+        for client, info in pre_scan_items:
+            self._process_client(ws, client, info, week_str, stats, missing_folders)
 
         try:
             wb.save(excel_file)
             self.logger.log("Excel saved.", "ok")
         except Exception as e:
             self.logger.log(f"Excel save error: {e}", "error")
+        self.logger.log(io_scheduler.report())
+        if _supervisor is not None and _supervisor.unavailable is not None:
+            self.logger.log(f"Conversions ran in this process, without isolation: {_supervisor.unavailable}", "warn")
+        memory.stop()
+        self.logger.log(memory.report())
 
         # Show final summary with missing folders
         if missing_folders:
@@ -853,6 +3744,203 @@ class App(tb.Window):
 
         self._finish(True, missing_folders)
 
+    def _convert_word_upfront(self, infos):
+        """Convert every Word timesheet of the run in one converter session; each info gets its folder's results"""
+        owners = {}
+        for info in infos:
+            snapshot = info.get("snapshot")
+            if not info.get("week") or snapshot is None or info.get("status") == "timeout":
+                continue
+            for job in word_jobs_in(snapshot):
+                owners[job] = info
+        if not owners:
+            return
+        self._add_activity_line(f"Converting {len(owners)} Word timesheets in one batch...")
+        try:
+            results = convert_word_documents(list(owners))
+        except Exception as e:
+            self.logger.log(f"Batch Word conversion failed, converting per client: {e}", "warn")
+            return
+        for (path, _, _), info in owners.items():
+            info.setdefault("word", {})[path] = results[path]
+        converted = sum(1 for r in results.values() if not isinstance(r, Exception) and not r[1])
+        cached = sum(1 for r in results.values() if not isinstance(r, Exception) and r[1])
+        self.logger.log(f"Word batch ({word_backend_name()}): {converted} converted, {cached} cached, "
+                        f"{len(results) - converted - cached} failed", "info")
+
+    def _process_client(self, ws, client, info, week_str, stats, missing_folders):
+        """Prepare, merge, record in Excel and back up one client's week folder"""
+        try:
+            self.logger.log(f"--- Processing client: {client} ---")
+            self._add_activity_line(f"Processing: {client}")
+
+            if info.get("status") == "timeout":
+                # The scan already waited SCAN_DIR_TIMEOUT on this share; don't block the run on it again
+                self.logger.log(f"Skipping {client}: share did not answer during the scan.", "warn")
+                self._add_activity_line(f"⏱️  Skipped {client} (share not responding)")
+                stats["warnings"] += 1
+                missing_folders.append(f"{client} (share not responding)")
+                self._increment_task_and_update()
+                return
+            
+            client_root = os.path.join(main_folder, client)
+            if not os.path.isdir(client_root):
+                self.logger.log(f"Client folder not found: {client_root}", "error")
+                self._add_activity_line(f"❌ Client folder missing: {client}")
+                stats["errors"] += 1
+                missing_folders.append(f"{client} (main folder)")
+                self._increment_task_and_update()
+                return
+
+            week_path = info.get("week")
+            if not week_path:
+                week_path = find_week_folder(client_root, week_str)
+            if not week_path:
+                self.logger.log(f"Week folder not found for {client} (week {week_str}).", "warn")
+                self._add_activity_line(f"⚠️  Week folder missing: {client} (Week {week_str})")
+                stats["warnings"] += 1
+                missing_folders.append(f"{client} (Week {week_str})")
+                self._increment_task_and_update()
+                return
+            self.logger.log(f"Found week folder: {week_path}", "ok")
+            self._increment_task_and_update()
+
+            # File preparation with progress updates
+            self._add_activity_line(f"Preparing files for {client}...")
+            prepared_list, invoice_doc, raw_files = prepare_files_for_merge(
+                week_path, logger=self.logger, snapshot=info.get("snapshot"), word_results=info.get("word"))
+            self._increment_task_and_update()
+
+            out_path = ""
+            merged = False
+            if prepared_list and invoice_doc:
+                try:
+                    self._add_activity_line(f"Creating merged file with invoice and {len(prepared_list)} timesheets for {client}...")
+                    
+                    # Generate output filename with invoice name + underscore
+                    original_invoice_name = os.path.splitext(os.path.basename(invoice_doc.source))[0]
+                    out_name = f"{original_invoice_name}_.pdf"
+                    out_path = os.path.join(week_path, out_name)
+
+                    # Invoice first, then all timesheets chronologically, into one writer
+                    docs = [invoice_doc] + prepared_list
+                    result = write_merged_pdf(out_path, docs, on_progress=self._merge_progress)
+                    
+                    merged = True
+                    self.logger.log(f"New merged PDF created: {out_path}", "ok")
+                    log_merge_result(self.logger, result)
+                    record_recent_merge(out_path, client, week_str)
+                    self.after(0, self.populate_recent_merges)
+                    stats["merged"] += 1
+                    self._add_activity_line(f"✓ Created merged file for {client}: {os.path.basename(out_path)}")
+                    
+                except Exception as e:
+                    self.logger.log(f"Merge failed for {client}: {e}", "error")
+                    self._add_activity_line(f"❌ Merge failed for {client}")
+                    stats["errors"] += 1
+                finally:
+                    self._increment_task_and_update()
+            elif prepared_list and not invoice_doc:
+                # Only timesheets, no invoice - create a new file
+                try:
+                    self._add_activity_line(f"Creating timesheet compilation for {client}...")
+                    # Generate output filename
+                    out_name = f"{client}_Week_{week_str}.pdf"
+                    out_path = os.path.join(week_path, out_name)
+                    result = write_merged_pdf(out_path, prepared_list, on_progress=self._merge_progress)
+                    
+                    merged = True
+                    self.logger.log(f"Timesheet compilation created: {out_path}", "ok")
+                    log_merge_result(self.logger, result)
+                    record_recent_merge(out_path, client, week_str)
+                    self.after(0, self.populate_recent_merges)
+                    stats["merged"] += 1
+                    self._add_activity_line(f"✓ Timesheet compilation for {client}: {os.path.basename(out_path)}")
+                except Exception as e:
+                    self.logger.log(f"Timesheet compilation failed for {client}: {e}", "error")
+                    self._add_activity_line(f"❌ Timesheet compilation failed for {client}")
+                    stats["errors"] += 1
+                finally:
+                    self._increment_task_and_update()
+            else:
+                self.logger.log(f"No files to process for {client}.", "warn")
+                self._add_activity_line(f"⚠️  No files to process for {client}")
+                stats["warnings"] += 1
+                self._increment_task_and_update()
+
+            try:
+                # Improved Excel lookup with better client name matching
+                self._add_activity_line(f"Updating Excel for {client}...")
+                updated = False
+                client_found = False
+                for r in range(4, ws.max_row + 1):
+                    cell_val = ws.cell(row=r, column=2).value
+                    if cell_val:
+                        # Normalize both strings for comparison
+                        excel_client = str(cell_val).strip()
+                        target_client = client.strip()
+                        
+                        # Try exact match first
+                        if excel_client == target_client:
+                            ws.cell(row=r, column=7).value = out_path if prepared_list else ""
+                            updated = True
+                            client_found = True
+                            self.logger.log(f"Excel updated for {client} (exact match).", "ok")
+                            self._add_activity_line(f"✓ Excel updated for {client}")
+                            break
+                        # Try case-insensitive match
+                        elif excel_client.lower() == target_client.lower():
+                            ws.cell(row=r, column=7).value = out_path if prepared_list else ""
+                            updated = True
+                            client_found = True
+                            self.logger.log(f"Excel updated for {client} (case-insensitive match).", "ok")
+                            self._add_activity_line(f"✓ Excel updated for {client}")
+                            break
+                
+                if not client_found:
+                    self.logger.log(f"Client '{client}' not found in Excel Col B (rows 4..{ws.max_row}).", "warn")
+                    self._add_activity_line(f"⚠️  Client '{client}' not found in Excel")
+                    stats["warnings"] += 1
+                    
+            except Exception as e:
+                self.logger.log(f"Excel update failed for {client}: {e}", "error")
+                self._add_activity_line(f"❌ Excel update failed for {client}")
+                stats["errors"] += 1
+            finally:
+                self._increment_task_and_update()
+
+            # NEW: Backup raw files after successful processing
+            try:
+                if raw_files and not merged:
+                    # Nothing was written, so nothing of this week folder is in a merged file yet
+                    self.logger.log(f"No merged file for {client} - raw files left in the week folder.", "warn")
+                elif raw_files:  # Only the files that went into the merge
+                    self._add_activity_line(f"Backing up raw files for {client}...")
+                    backup_raw_files(raw_files, client, week_str, logger=self.logger)
+                    if read_ahead is not None:
+                        read_ahead.release(raw_files)
+                    self._add_activity_line(f"✓ Backup complete for {client}")
+                else:
+                    self.logger.log(f"No raw files to backup for {client}.", "warn")
+                    
+            except Exception as e:
+                self.logger.log(f"Backup failed for {client}: {e}", "error")
+                self._add_activity_line(f"❌ Backup failed for {client}")
+                stats["errors"] += 1
+            finally:
+                self._increment_task_and_update()
+
+            stats["processed"] += 1
+            self._safe_set_status(**stats)
+
+        except Exception as e:
+            self.logger.log(f"Unexpected failure for {client}: {e}", "error")
+            stats["errors"] += 1
+            self._increment_task_and_update()
+        finally:
+            # Outputs and backups changed the folder - the next scan must look again
+            scan_cache.invalidate(client, week_str)
+
     def _increment_task_and_update(self):
         with self._lock:
             self.tasks_done += 1
@@ -898,6 +3986,10 @@ class App(tb.Window):
             print(f"Canvas progress update error: {e}")
             pass
 
+    def _merge_progress(self, done, total):
+        # Update progress during merge
+        self._update_progress_without_increment(int(done / max(1, total) * 50))
+
     def _update_progress_without_increment(self, sub_progress):
         """Update progress bar with sub-task progress without incrementing task counter"""
         try:
@@ -944,6 +4036,7 @@ class App(tb.Window):
             else:
                 self.eta_label.after(0, lambda: self.eta_label.configure(text="Done ✅"))
             self.start_btn.after(0, lambda: self.start_btn.configure(state="normal"))
+            self.batch_btn.after(0, lambda: self.batch_btn.configure(state="normal"))
         except Exception:
             pass
         
@@ -954,6 +4047,11 @@ class App(tb.Window):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # conversion workers when run as a frozen .exe
+    if len(sys.argv) > 2 and sys.argv[1] == "--benchmark-pdf":
+        print_pdf_benchmark(sys.argv[2:])
+        sys.exit(0)
+    init_runtime()
     app = App()
     app.title(APP_TITLE)
     app.configure(bg=THEME_BG)